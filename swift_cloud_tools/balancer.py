@@ -0,0 +1,176 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import requests
+import logging
+import random
+import time
+
+logger = logging.getLogger('swift-cloud-tools')
+
+STRATEGIES = ('least_outstanding', 'ewma')
+
+
+class Host(object):
+
+    def __init__(self, url, session=None):
+        self.url = url.rstrip('/')
+        self.sct_url = '{}/v1'.format(self.url)
+        self.session = session if session is not None else requests.Session()
+
+        self.outstanding = 0
+        self.ewma = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now=None):
+        return self.ejected_until > (now if now is not None else time.monotonic())
+
+    def stats(self):
+        return {
+            'url': self.url,
+            'outstanding': self.outstanding,
+            'ewma': self.ewma,
+            'requests': self.requests,
+            'failures': self.failures,
+            'ejected': self.is_ejected()
+        }
+
+
+class HostPool(object):
+    """Client-side balancing over several SCT hosts.
+
+    Hosts are picked by fewest outstanding requests or by EWMA latency weighted
+    by outstanding requests. A host is ejected for ``ejection_time`` seconds,
+    doubling up to ``max_ejection_time``, after ``failure_threshold``
+    consecutive failures or a failed active health check.
+    """
+
+    def __init__(self, hosts, strategy='least_outstanding', failure_threshold=3,
+                 ejection_time=10, max_ejection_time=300, decay=0.3,
+                 health_check_path=None, health_check_interval=10, health_check_timeout=2):
+        if strategy not in STRATEGIES:
+            raise ValueError('strategy must be one of: {}'.format(', '.join(STRATEGIES)))
+        if not hosts:
+            raise ValueError('at least one host is required')
+
+        self.hosts = [host if isinstance(host, Host) else Host(host) for host in hosts]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self.max_ejection_time = max_ejection_time
+        self.decay = decay
+        self.health_check_path = health_check_path
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checker = None
+
+    def _score(self, host):
+        if self.strategy == 'ewma':
+            return (host.ewma or 0.0) * (host.outstanding + 1)
+        return (host.outstanding, host.ewma or 0.0)
+
+    def choose(self, exclude=()):
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = [host for host in self.hosts if host not in exclude]
+            if not candidates:
+                return None
+
+            healthy = [host for host in candidates if not host.is_ejected(now)]
+            if not healthy:
+                return min(candidates, key=lambda host: host.ejected_until)
+
+            random.shuffle(healthy)
+            return min(healthy, key=self._score)
+
+    def start(self, host):
+        with self._lock:
+            host.outstanding += 1
+            host.requests += 1
+
+    def finish(self, host, latency, failed=False):
+        with self._lock:
+            host.outstanding -= 1
+
+            if host.ewma is None:
+                host.ewma = latency
+            else:
+                host.ewma = self.decay * latency + (1 - self.decay) * host.ewma
+
+            if failed:
+                host.failures += 1
+                host.consecutive_failures += 1
+                if host.consecutive_failures >= self.failure_threshold:
+                    self._eject(host)
+            else:
+                host.consecutive_failures = 0
+                host.ejections = 0
+                host.ejected_until = 0.0
+
+    def _eject(self, host):
+        duration = min(self.ejection_time * 2 ** host.ejections, self.max_ejection_time)
+        host.ejections += 1
+        host.ejected_until = time.monotonic() + duration
+        logger.warning('Ejecting SCT host %s for %ss', host.url, duration)
+
+    def check(self):
+        for host in self.hosts:
+            try:
+                response = host.session.get(
+                    '{}{}'.format(host.url, self.health_check_path),
+                    timeout=self.health_check_timeout
+                )
+                healthy = response.status_code < 500
+            except requests.exceptions.RequestException:
+                healthy = False
+
+            with self._lock:
+                if healthy:
+                    host.consecutive_failures = 0
+                    host.ejections = 0
+                    host.ejected_until = 0.0
+                elif not host.is_ejected():
+                    self._eject(host)
+
+    def _run_checks(self):
+        while not self._stop.wait(self.health_check_interval):
+            self.check()
+
+    def start_health_checks(self):
+        if self.health_check_path is None or self._checker is not None:
+            return
+
+        self._stop.clear()
+        self._checker = threading.Thread(target=self._run_checks, name='sct-health-check')
+        self._checker.daemon = True
+        self._checker.start()
+
+    def stop_health_checks(self):
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+            self._checker = None
+
+    def stats(self):
+        with self._lock:
+            return [host.stats() for host in self.hosts]
@@ -15,22 +15,191 @@
 import requests
 import logging
 import json
+import time
+
+from swift_cloud_tools.exceptions import DeadlineExceeded
+from swift_cloud_tools.balancer import Host, HostPool
+from swift_cloud_tools.deadline import Deadline
+from swift_cloud_tools.log import RequestLogger
+from swift_cloud_tools import green
 
 logger = logging.getLogger('swift-cloud-tools')
 
+IDEMPOTENT_METHODS = ('get', 'delete')
+DEFAULT_TIMEOUT = (3.05, 30)
+DEADLINE_HEADER = 'X-Request-Timeout-Ms'
+
 
 class SCTClient(object):
 
-    def __init__(self, sct_host, sct_api_key):
+    def __init__(self, sct_host, sct_api_key, session=None, hedger=None, limiter=None,
+                 timeout=DEFAULT_TIMEOUT, deadline=None, cooperative=False,
+                 request_logger=None, transport=None):
+        if cooperative:
+            green.check_cooperative()
+
+        if session is None and transport is not None:
+            session = transport.session
+
+        self.pool = None
+        if isinstance(sct_host, HostPool):
+            self.pool = sct_host
+            if transport is not None:
+                for host in self.pool.hosts:
+                    host.session = transport.session
+        elif isinstance(sct_host, (list, tuple)):
+            # Without a session each host keeps its own connection pool.
+            self.pool = HostPool([
+                Host(host, session=session if session is not None
+                     else green.session() if cooperative else None)
+                for host in sct_host
+            ])
+        elif session is None and cooperative:
+            session = green.session()
+
+        if self.pool is not None:
+            sct_host = self.pool.hosts[0].url
+            self.pool.start_health_checks()
+
         self.sct_url = '{}/v1'.format(sct_host)
         self.sct_api_key = sct_api_key
+        self.session = session
+        self.hedger = hedger
+        self.limiter = limiter
+        self.timeout = timeout
+        self.deadline = deadline
+        self.cooperative = cooperative
+        self.request_logger = (request_logger if request_logger is not None
+                               else RequestLogger(logger))
+        self.transport = transport
+
+        if transport is not None:
+            for url in ([host.url for host in self.pool.hosts] if self.pool is not None
+                        else [sct_host]):
+                transport.warm(url)
 
-    def expirer_create(self, account, container, obj, date):
-        headers = {
+    def _headers(self):
+        return {
             'Content-type': 'application/json',
             'X-Auth-Token': self.sct_api_key
         }
 
+    def _request(self, method, path, data=None, idempotent=None, timeout=None, deadline=None,
+                 endpoint=None):
+        kwargs = {'headers': self._headers()}
+        timeout = timeout if timeout is not None else self.timeout
+        deadline = Deadline.coerce(deadline if deadline is not None else self.deadline)
+
+        if data is not None:
+            kwargs['data'] = json.dumps(data)
+
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+
+        if self.pool is not None:
+            def call():
+                return self._balanced(method, path, kwargs, idempotent, timeout, deadline)
+        else:
+            transport = self.session if self.session is not None else requests
+            send = getattr(transport, method)
+            url = '{}{}'.format(self.sct_url, path)
+
+            def call():
+                return self._send(method, send, url, kwargs, timeout, deadline)
+
+        if self.hedger is not None and method == 'get':
+            return self.hedger.call(call, endpoint=endpoint or path)
+
+        return call()
+
+    def _balanced(self, method, path, kwargs, idempotent, timeout, deadline):
+        attempts = len(self.pool.hosts) if idempotent else 1
+        tried = []
+        response = error = None
+
+        for attempt in range(attempts):
+            if deadline is not None:
+                deadline.check()
+
+            host = self.pool.choose(exclude=tried)
+            if host is None:
+                break
+
+            tried.append(host)
+
+            try:
+                response = self._send(
+                    method, getattr(host.session, method), '{}{}'.format(host.sct_url, path),
+                    kwargs, timeout, deadline, host=host)
+            except DeadlineExceeded:
+                raise
+            except requests.exceptions.RequestException as err:
+                logger.warning('SCT host %s failed: %s', host.url, err)
+                error = err
+                continue
+
+            failed = response.status_code >= 500
+            if not failed or attempt == attempts - 1:
+                return response
+
+            response.close()
+            error = None
+
+        if error is not None:
+            raise error
+        return response
+
+    def _send(self, method, send, url, kwargs, timeout=None, deadline=None, host=None):
+        if self.limiter is not None:
+            acquired = self.limiter.acquire(
+                timeout=deadline.remaining() if deadline is not None else None)
+            if not acquired:
+                raise DeadlineExceeded('deadline exceeded waiting for a concurrency slot')
+
+        try:
+            kwargs = dict(kwargs, timeout=timeout)
+            if deadline is not None:
+                kwargs['timeout'] = deadline.timeout(timeout)
+                kwargs['headers'] = dict(kwargs['headers'])
+                kwargs['headers'][DEADLINE_HEADER] = str(int(deadline.remaining() * 1000))
+        except DeadlineExceeded:
+            if self.limiter is not None:
+                self.limiter.release()
+            raise
+
+        # Only count the host once the request is actually sent, waiting for
+        # a slot or an expired deadline says nothing about its health.
+        if host is not None:
+            self.pool.start(host)
+        start = time.monotonic()
+
+        try:
+            response = send(url, **kwargs)
+        except Exception as err:
+            elapsed = time.monotonic() - start
+            timed_out = isinstance(err, requests.exceptions.Timeout)
+            out_of_budget = timed_out and deadline is not None and deadline.expired()
+            if host is not None:
+                # A timeout cut short by our own deadline is not the host's fault.
+                self.pool.finish(host, elapsed, failed=not out_of_budget)
+            self.request_logger.log(method, url, elapsed=elapsed, error=err)
+            if self.limiter is not None:
+                self.limiter.release(elapsed, dropped=True)
+            if out_of_budget:
+                raise DeadlineExceeded(
+                    'deadline of {}s exceeded'.format(deadline.seconds)) from err
+            raise
+
+        elapsed = time.monotonic() - start
+        if host is not None:
+            self.pool.finish(host, elapsed, failed=response.status_code >= 500)
+        self.request_logger.log(method, url, response.status_code, elapsed)
+
+        if self.limiter is not None:
+            self.limiter.release(elapsed, dropped=self.limiter.is_drop(response.status_code))
+        return response
+
+    def expirer_create(self, account, container, obj, date, timeout=None, deadline=None):
         data = {
             "account": account,
             "container": container,
@@ -38,109 +207,55 @@ class SCTClient(object):
             "date": date
         }
 
-        response = requests.post(
-            '{}/expirer/'.format(self.sct_url),
-            data=json.dumps(data),
-            headers=headers
-        )
-        return response
-
-    def expirer_delete(self, account, container, obj):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
+        return self._request(
+            'post', '/expirer/', data=data, timeout=timeout, deadline=deadline)
 
+    def expirer_delete(self, account, container, obj, timeout=None, deadline=None):
         data = {
             "account": account,
             "container": container,
             "object": obj
         }
 
-        response = requests.delete(
-            '{}/expirer/'.format(self.sct_url),
-            data=json.dumps(data),
-            headers=headers
-        )
-        return response
-
-    def transfer_create(self, project_id, project_name, environment):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
+        return self._request(
+            'delete', '/expirer/', data=data, timeout=timeout, deadline=deadline)
 
+    def transfer_create(self, project_id, project_name, environment, timeout=None, deadline=None):
         data = {
             "project_id": project_id,
             "project_name": project_name,
             "environment": environment
         }
 
-        response = requests.post(
-            '{}/transfer/'.format(self.sct_url),
-            data=json.dumps(data),
-            headers=headers
-        )
-        return response
-
-    def transfer_get(self, project_id):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
-
-        response = requests.get(
-            '{}/transfer/{}'.format(self.sct_url, project_id),
-            headers=headers
-        )
-        return response
-
-    def transfer_status(self, project_id):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
-
-        response = requests.get(
-            '{}/transfer/status/{}'.format(self.sct_url, project_id),
-            headers=headers
-        )
-        return response
+        return self._request(
+            'post', '/transfer/', data=data, timeout=timeout, deadline=deadline)
 
-    def transfer_status_all(self, page=1, per_page=50):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
-
-        response = requests.get(
-            '{}/transfer/status?page={}&per_page={}'.format(self.sct_url, page, per_page),
-            headers=headers
-        )
-        return response
+    def transfer_get(self, project_id, timeout=None, deadline=None):
+        return self._request(
+            'get', '/transfer/{}'.format(project_id), timeout=timeout, deadline=deadline,
+            endpoint='transfer_get')
 
-    def transfer_status_by_projects(self, project_ids):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
+    def transfer_status(self, project_id, timeout=None, deadline=None):
+        return self._request(
+            'get', '/transfer/status/{}'.format(project_id),
+            timeout=timeout, deadline=deadline, endpoint='transfer_status')
 
-        response = requests.post(
-            '{}/transfer/status'.format(self.sct_url),
-            data=json.dumps(project_ids),
-            headers=headers
-        )
-        return response
+    def transfer_status_all(self, page=1, per_page=50, timeout=None, deadline=None):
+        return self._request(
+            'get', '/transfer/status?page={}&per_page={}'.format(page, per_page),
+            timeout=timeout, deadline=deadline, endpoint='transfer_status_all')
 
-    def billing_get_price_from_service(self, service, sku, amount):
-        headers = {
-            'Content-type': 'application/json',
-            'X-Auth-Token': self.sct_api_key
-        }
+    def transfer_status_by_projects(self, project_ids, timeout=None, deadline=None):
+        return self._request(
+            'post', '/transfer/status', data=project_ids, idempotent=True,
+            timeout=timeout, deadline=deadline)
 
-        response = requests.get(
-            '{}/billing/sku_price_from_service/service/{}/sku/{}/amount/{}'.format(
-                self.sct_url, service, sku, amount),
-            headers=headers
+    def billing_get_price_from_service(self, service, sku, amount, timeout=None, deadline=None):
+        return self._request(
+            'get',
+            '/billing/sku_price_from_service/service/{}/sku/{}/amount/{}'.format(
+                service, sku, amount),
+            timeout=timeout,
+            deadline=deadline,
+            endpoint='billing_get_price_from_service'
         )
-        return response
@@ -0,0 +1,161 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+
+import threading
+import time
+
+from swift_cloud_tools import green
+
+DROP_STATUSES = (429, 502, 503, 504)
+
+
+class AdaptiveLimiter(object):
+    """AIMD limit on in-flight requests driven by latency and overload signals.
+
+    Every successful call grows the limit by ``1 / limit`` (about one slot per
+    round trip) while the slots are in use. A throttled or failed call, or a
+    short-term average latency (``short_window`` calls) above ``tolerance``
+    times the long-term one (``long_window`` calls), shrinks it by
+    ``backoff``, at most once per smoothed round trip.
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=64, backoff=0.9,
+                 tolerance=2.0, short_window=10, long_window=500):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.short_window = short_window
+
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._inflight = 0
+        self._short_decay = 2.0 / (short_window + 1)
+        self._long_decay = 2.0 / (long_window + 1)
+        self._short_rtt = None
+        self._long_rtt = None
+        self._samples = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+        self.successes = 0
+        self.drops = 0
+        self.latency_decreases = 0
+
+    @property
+    def limit(self):
+        return int(self._limit)
+
+    @property
+    def inflight(self):
+        return self._inflight
+
+    def baseline(self):
+        with self._cond:
+            return self._long_rtt
+
+    def acquire(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._inflight < int(self._limit), timeout):
+                return False
+            self._inflight += 1
+            return True
+
+    def _observe(self, latency):
+        self._samples += 1
+        if self._short_rtt is None:
+            self._short_rtt = self._long_rtt = latency
+            return
+
+        self._short_rtt += self._short_decay * (latency - self._short_rtt)
+        self._long_rtt += self._long_decay * (latency - self._long_rtt)
+
+    def _overloaded(self):
+        if self._samples < self.short_window:
+            return False
+        return self._short_rtt > self.tolerance * self._long_rtt
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease < (self._short_rtt or 0.0):
+            return False
+
+        self._last_decrease = now
+        self._limit = max(self.min_limit, self._limit * self.backoff)
+        return True
+
+    def release(self, latency=None, dropped=False):
+        with self._cond:
+            utilized = self._inflight >= self._limit / 2
+            self._inflight -= 1
+
+            if latency is None:
+                self._cond.notify_all()
+                return
+
+            if dropped:
+                self.drops += 1
+                self._decrease()
+            else:
+                self.successes += 1
+                self._observe(latency)
+
+                if self._overloaded():
+                    if self._decrease():
+                        self.latency_decreases += 1
+                elif utilized:
+                    self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+
+            self._cond.notify_all()
+
+    def is_drop(self, status_code):
+        return status_code in DROP_STATUSES
+
+    def stats(self):
+        with self._cond:
+            return {
+                'limit': int(self._limit),
+                'inflight': self._inflight,
+                'short_rtt': self._short_rtt,
+                'long_rtt': self._long_rtt,
+                'successes': self.successes,
+                'drops': self.drops,
+                'latency_decreases': self.latency_decreases
+            }
+
+
+def imap_ordered(func, items, workers=1):
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    green_pool = green.pool(workers)
+    if green_pool is not None:
+        for result in green_pool.imap(func, items):
+            yield result
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        window = deque()
+
+        for item in items:
+            window.append(executor.submit(func, item))
+            if len(window) >= workers * 2:
+                yield window.popleft().result()
+
+        while window:
+            yield window.popleft().result()
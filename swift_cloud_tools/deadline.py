@@ -0,0 +1,52 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from swift_cloud_tools.exceptions import DeadlineExceeded
+
+
+class Deadline(object):
+    """Total time budget shared by every attempt of one or more calls."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, deadline):
+        if deadline is None or isinstance(deadline, cls):
+            return deadline
+        return cls(deadline)
+
+    def remaining(self):
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceeded('deadline of {}s exceeded'.format(self.seconds))
+
+    def timeout(self, timeout=None):
+        self.check()
+        remaining = self.remaining()
+
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) if part is not None else remaining
+                         for part in timeout)
+        return min(timeout, remaining)
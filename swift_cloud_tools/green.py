@@ -0,0 +1,109 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import requests
+import logging
+import socket
+import sys
+
+from swift_cloud_tools.exceptions import SCTClientException
+
+logger = logging.getLogger('swift-cloud-tools')
+
+EVENTLET = 'eventlet'
+GEVENT = 'gevent'
+
+
+def hub():
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher
+        if patcher.is_monkey_patched('socket'):
+            return EVENTLET
+
+    if 'gevent' in sys.modules:
+        from gevent import monkey
+        if monkey.is_module_patched('socket'):
+            return GEVENT
+
+    return None
+
+
+def is_cooperative():
+    return hub() is not None
+
+
+def has_green_dns():
+    current = hub()
+
+    if current == EVENTLET:
+        try:
+            from eventlet.support import greendns
+        except ImportError:
+            return False
+        return socket.getaddrinfo is greendns.getaddrinfo
+
+    return current == GEVENT
+
+
+def check_cooperative():
+    current = hub()
+    if current is None:
+        raise SCTClientException(
+            'cooperative mode requires eventlet or gevent monkey patching of socket')
+
+    if not has_green_dns():
+        logger.warning('%s is active but DNS resolution is blocking; '
+                       'install dnspython or use IP addresses', current)
+
+    return current
+
+
+def session(pool_size=100):
+    green_session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    green_session.mount('http://', adapter)
+    green_session.mount('https://', adapter)
+    return green_session
+
+
+def pool(size):
+    current = hub()
+
+    if current == EVENTLET:
+        import eventlet
+        return eventlet.GreenPool(size)
+
+    if current == GEVENT:
+        from gevent.pool import Pool
+        return Pool(size)
+
+    return None
+
+
+def spawn(func, *args, **kwargs):
+    current = hub()
+
+    if current == EVENTLET:
+        import eventlet
+        return eventlet.spawn(func, *args, **kwargs)
+
+    if current == GEVENT:
+        import gevent
+        return gevent.spawn(func, *args, **kwargs)
+
+    thread = threading.Thread(target=func, args=args, kwargs=kwargs)
+    thread.daemon = True
+    thread.start()
+    return thread
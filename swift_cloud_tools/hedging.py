@@ -0,0 +1,227 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from collections import deque
+
+import threading
+import time
+
+from swift_cloud_tools import green
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+
+    values = sorted(values)
+    index = int(round((pct / 100.0) * (len(values) - 1)))
+    return values[index]
+
+
+def _close(future):
+    if future.exception() is not None:
+        return
+
+    close = getattr(future.result()[0], 'close', None)
+    if close is not None:
+        close()
+
+
+class _Window(object):
+
+    def __init__(self, size):
+        self.latencies = deque(maxlen=size)
+        self.delay = None
+        self.new_samples = 0
+
+    def add(self, latency):
+        self.latencies.append(latency)
+        self.new_samples += 1
+
+
+class Hedger(object):
+    """Sends a second copy of slow idempotent requests and keeps the first answer.
+
+    The hedge is sent after ``delay`` seconds or, when ``delay`` is None, after
+    the observed ``percentile`` latency once ``min_samples`` calls were seen,
+    recomputed every ``refresh_every`` calls. Latencies are kept per
+    ``endpoint`` so slow endpoints do not set the delay of fast ones. At most ``max_ratio`` of the calls are hedged. Calls that cannot be
+    hedged run on the calling thread; the others start right away on their
+    own thread, so hedging never queues or caps concurrent calls.
+    """
+
+    def __init__(self, delay=None, percentile=95, max_ratio=0.1, min_samples=20,
+                 window=1000, refresh_every=20):
+        self.delay = delay
+        self.percentile = percentile
+        self.max_ratio = max_ratio
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+
+        self._lock = threading.Condition()
+        self._running = 0
+        self._window = window
+        self._windows = {}
+        self._latencies = deque(maxlen=window)
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.time_saved = 0.0
+
+    def hedge_delay(self, endpoint=None):
+        if self.delay is not None:
+            return self.delay
+
+        with self._lock:
+            window = self._windows.get(endpoint)
+            if window is None or len(window.latencies) < self.min_samples:
+                return None
+
+            if window.delay is None or window.new_samples >= self.refresh_every:
+                window.delay = percentile(window.latencies, self.percentile)
+                window.new_samples = 0
+            return window.delay
+
+    def _can_hedge(self):
+        return self.hedges + 1 <= self.max_ratio * self.calls
+
+    def _allow_hedge(self):
+        with self._lock:
+            if not self._can_hedge():
+                return False
+            self.hedges += 1
+            return True
+
+    def _timed(self, func):
+        start = time.monotonic()
+        return func(), time.monotonic() - start
+
+    def _record(self, latency, primary_latency=None, endpoint=None):
+        with self._lock:
+            self._latencies.append(latency)
+            if primary_latency is not None:
+                self._add_primary(primary_latency, endpoint)
+
+    def _add_primary(self, latency, endpoint=None):
+        window = self._windows.get(endpoint)
+        if window is None:
+            window = self._windows[endpoint] = _Window(self._window)
+        window.add(latency)
+
+    def _run(self, future, func):
+        try:
+            future.set_result(self._timed(func))
+        except BaseException as err:
+            future.set_exception(err)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._lock.notify_all()
+
+    def _spawn(self, func):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        with self._lock:
+            self._running += 1
+
+        green.spawn(self._run, future, func)
+        return future
+
+    def call(self, func, endpoint=None):
+        with self._lock:
+            self.calls += 1
+            can_hedge = self._can_hedge()
+
+        delay = self.hedge_delay(endpoint) if can_hedge else None
+        start = time.monotonic()
+
+        if delay is None:
+            result, latency = self._timed(func)
+            self._record(latency, latency, endpoint)
+            return result
+
+        primary = self._spawn(func)
+        primary.add_done_callback(lambda future: self._primary_done(future, endpoint))
+
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._allow_hedge():
+            result = primary.result()[0]
+            self._record(time.monotonic() - start)
+            return result
+
+        hedge = self._spawn(func)
+        pending = {primary, hedge}
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is not None or not pending:
+                break
+
+        if winner is None:
+            raise next(iter(done)).exception()
+
+        for loser in pending:
+            loser.add_done_callback(_close)
+
+        latency = time.monotonic() - start
+        self._record(latency)
+
+        if winner is hedge:
+            with self._lock:
+                self.hedge_wins += 1
+            primary.add_done_callback(
+                lambda future: self._saved(future, start, latency))
+
+        return winner.result()[0]
+
+    def _primary_done(self, future, endpoint=None):
+        if future.exception() is None:
+            with self._lock:
+                self._add_primary(future.result()[1], endpoint)
+
+    def _saved(self, future, start, latency):
+        if future.exception() is not None:
+            return
+
+        with self._lock:
+            self.time_saved += max(future.result()[1] - latency, 0.0)
+
+    def stats(self):
+        with self._lock:
+            primary = [latency for window in self._windows.values()
+                       for latency in window.latencies]
+            effective = list(self._latencies)
+
+            return {
+                'calls': self.calls,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins,
+                'time_saved': self.time_saved,
+                'primary_p50': percentile(primary, 50),
+                'primary_p95': percentile(primary, 95),
+                'primary_p99': percentile(primary, 99),
+                'p50': percentile(effective, 50),
+                'p95': percentile(effective, 95),
+                'p99': percentile(effective, 99),
+                'delays': dict((endpoint, window.delay)
+                               for endpoint, window in self._windows.items())
+            }
+
+    def shutdown(self, wait=False):
+        if wait:
+            with self._lock:
+                self._lock.wait_for(lambda: self._running == 0)
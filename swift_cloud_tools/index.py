@@ -0,0 +1,253 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import threading
+import logging
+import heapq
+import time
+
+logger = logging.getLogger('swift-cloud-tools')
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+STATUS_WAITING = 'waiting'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+
+
+def _parse_date(value):
+    if not value:
+        return None
+
+    try:
+        return datetime.strptime(value, DATE_FORMAT).timestamp()
+    except ValueError:
+        return None
+
+
+class TransferRecord(object):
+
+    __slots__ = (
+        'project_id', 'project_name', 'environment', 'status', 'progress',
+        'initial_date', 'final_date', 'count_error', 'object_count_swift',
+        'object_count_gcp', 'bytes_used_swift', 'bytes_used_gcp'
+    )
+
+    def __init__(self, item):
+        self.project_id = item['project_id']
+        self.project_name = item.get('project_name')
+        self.environment = item.get('environment')
+        self.initial_date = _parse_date(item.get('initial_date'))
+        self.final_date = _parse_date(item.get('final_date'))
+        self.count_error = item.get('count_error') or 0
+        self.object_count_swift = item.get('object_count_swift') or 0
+        self.object_count_gcp = item.get('object_count_gcp') or 0
+        self.bytes_used_swift = item.get('bytes_used_swift') or 0
+        self.bytes_used_gcp = item.get('bytes_used_gcp') or 0
+
+        if self.final_date is not None:
+            self.status = STATUS_COMPLETED
+        elif self.initial_date is not None:
+            self.status = STATUS_RUNNING
+        else:
+            self.status = STATUS_WAITING
+
+        if item.get('progress') is not None:
+            self.progress = item['progress']
+        elif self.status == STATUS_COMPLETED:
+            self.progress = 100
+        elif self.object_count_swift:
+            self.progress = min(100, 100 * self.object_count_gcp // self.object_count_swift)
+        else:
+            self.progress = 0
+
+    @property
+    def active(self):
+        return self.status != STATUS_COMPLETED
+
+    @property
+    def duration(self):
+        if self.initial_date is None:
+            return None
+
+        end = self.final_date if self.final_date is not None else time.time()
+        return end - self.initial_date
+
+    def to_dict(self):
+        return dict((field, getattr(self, field)) for field in self.__slots__)
+
+
+class TransferStatusIndex(object):
+    """In-memory view of every transfer, queried locally.
+
+    ``load`` pages through ``transfer_status_all``; ``refresh`` only re-fetches
+    projects that are not completed, through ``transfer_status_by_projects``,
+    and falls back to a full load every ``full_refresh_every`` refreshes so
+    new projects show up.
+    """
+
+    def __init__(self, client, per_page=500, batch_size=100, full_refresh_every=10):
+        self.client = client
+        self.per_page = per_page
+        self.batch_size = batch_size
+        self.full_refresh_every = full_refresh_every
+
+        self._lock = threading.RLock()
+        self._records = {}
+        self._by_status = defaultdict(set)
+        self._by_environment = defaultdict(set)
+        self._refreshes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.loaded_at = None
+        self.refreshed_at = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, project_id):
+        return project_id in self._records
+
+    def _fetch_page(self, page):
+        response = self.client.transfer_status_all(page=page, per_page=self.per_page)
+        response.raise_for_status()
+        return response.json()
+
+    def _put(self, record):
+        previous = self._records.get(record.project_id)
+        if previous is not None:
+            self._by_status[previous.status].discard(record.project_id)
+            self._by_environment[previous.environment].discard(record.project_id)
+
+        self._records[record.project_id] = record
+        self._by_status[record.status].add(record.project_id)
+        self._by_environment[record.environment].add(record.project_id)
+
+    def load(self):
+        records = []
+        page = pages = 1
+
+        while page <= pages:
+            content = self._fetch_page(page)
+            records.extend(TransferRecord(item) for item in content.get('items', []))
+            pages = content.get('pages') or 0
+            page += 1
+
+        with self._lock:
+            self._records = {}
+            self._by_status = defaultdict(set)
+            self._by_environment = defaultdict(set)
+            for record in records:
+                self._put(record)
+
+            self._refreshes = 0
+            self.loaded_at = self.refreshed_at = time.time()
+
+        logger.info('Transfer status index loaded with %s projects', len(records))
+        return len(records)
+
+    def refresh(self):
+        full = self.full_refresh_every and self._refreshes + 1 >= self.full_refresh_every
+        if self.loaded_at is None or full:
+            return self.load()
+
+        with self._lock:
+            active = [record.project_id for record in self._records.values() if record.active]
+
+        updated = []
+        for start in range(0, len(active), self.batch_size):
+            response = self.client.transfer_status_by_projects(active[start:start + self.batch_size])
+            response.raise_for_status()
+            updated.extend(TransferRecord(item) for item in response.json())
+
+        with self._lock:
+            for record in updated:
+                self._put(record)
+
+            self._refreshes += 1
+            self.refreshed_at = time.time()
+
+        return len(updated)
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('Transfer status index refresh failed')
+
+    def start(self, interval=60):
+        if self._thread is not None:
+            return
+
+        if self.loaded_at is None:
+            self.load()
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name='sct-transfer-index')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get(self, project_id):
+        return self._records.get(project_id)
+
+    def filter(self, status=None, environment=None, predicate=None):
+        with self._lock:
+            ids = None
+            if status is not None:
+                ids = set(self._by_status.get(status, ()))
+            if environment is not None:
+                environment_ids = self._by_environment.get(environment, set())
+                ids = ids & environment_ids if ids is not None else set(environment_ids)
+
+            if ids is None:
+                records = list(self._records.values())
+            else:
+                records = [self._records[project_id] for project_id in ids]
+
+        if predicate is not None:
+            records = [record for record in records if predicate(record)]
+        return records
+
+    def top(self, n, key='duration', largest=True, **filters):
+        records = [
+            record for record in self.filter(**filters)
+            if getattr(record, key) is not None
+        ]
+
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(n, records, key=lambda record: getattr(record, key))
+
+    def count_by(self, field, **filters):
+        if not filters:
+            index = {'status': self._by_status, 'environment': self._by_environment}.get(field)
+            if index is not None:
+                with self._lock:
+                    return Counter(dict((value, len(ids)) for value, ids in index.items() if ids))
+
+        return Counter(getattr(record, field) for record in self.filter(**filters))
+
+    def aggregate(self, field, **filters):
+        return sum(getattr(record, field) or 0 for record in self.filter(**filters))
@@ -0,0 +1,117 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging.handlers
+import logging
+import random
+import queue
+
+LOGGER_NAME = 'swift-cloud-tools'
+
+
+class RequestLogger(object):
+    """Structured per-request logging with sampling.
+
+    Errors (exceptions and status >= 400) and calls slower than
+    ``slow_threshold`` seconds are always logged at WARNING; successes are
+    logged at INFO for a ``success_rate`` fraction of calls. Nothing is built
+    or formatted unless the record will actually be emitted.
+    """
+
+    def __init__(self, logger=None, success_rate=0.01, slow_threshold=1.0, rand=random.random):
+        self.logger = logger if logger is not None else logging.getLogger(LOGGER_NAME)
+        self.success_rate = success_rate
+        self.slow_threshold = slow_threshold
+        self._rand = rand
+
+    def log(self, method, url, status=None, elapsed=0.0, error=None):
+        if error is not None or status is None or status >= 400:
+            level, kind = logging.WARNING, 'error'
+        elif self.slow_threshold is not None and elapsed >= self.slow_threshold:
+            level, kind = logging.WARNING, 'slow'
+        else:
+            if not self.success_rate or not self.logger.isEnabledFor(logging.INFO):
+                return
+            if self.success_rate < 1 and self._rand() >= self.success_rate:
+                return
+            level, kind = logging.INFO, 'sampled'
+
+        if not self.logger.isEnabledFor(level):
+            return
+
+        self.logger.log(
+            level, 'SCT %s %s %s %.1fms%s',
+            method.upper(), url, status, elapsed * 1000,
+            ' ({})'.format(error) if error is not None else '',
+            extra={'sct': {
+                'method': method,
+                'url': url,
+                'status': status,
+                'elapsed': elapsed,
+                'error': repr(error) if error is not None else None,
+                'kind': kind,
+                'sample_rate': self.success_rate if kind == 'sampled' else 1
+            }}
+        )
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to a bounded queue without formatting; drops when full."""
+
+    def __init__(self, record_queue):
+        super(NonBlockingQueueHandler, self).__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _emitting_handlers(logger):
+    handlers = []
+    current = logger
+
+    while current is not None:
+        handlers.extend(handler for handler in current.handlers if handler not in handlers)
+        if not current.propagate:
+            break
+        current = current.parent
+
+    return handlers
+
+
+def setup_async_logging(handlers=None, logger=None, max_size=10000):
+    if logger is None:
+        logger = logging.getLogger(LOGGER_NAME)
+    if handlers is None:
+        # Take over the handlers records would reach through propagation too.
+        handlers = _emitting_handlers(logger) or [logging.StreamHandler()]
+
+    record_queue = queue.Queue(max_size)
+    handler = NonBlockingQueueHandler(record_queue)
+    listener = logging.handlers.QueueListener(
+        record_queue, *handlers, respect_handler_level=True)
+
+    for existing in handlers:
+        logger.removeHandler(existing)
+    logger.addHandler(handler)
+    logger.propagate = False
+    listener.start()
+
+    return listener
@@ -0,0 +1,350 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import OrderedDict, deque
+
+import threading
+import requests
+import logging
+import time
+
+from swift_cloud_tools.concurrency import imap_ordered
+from swift_cloud_tools.client import SCTClient
+from swift_cloud_tools import green
+
+logger = logging.getLogger('swift-cloud-tools')
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+POLICIES = (DROP_NEWEST, DROP_OLDEST, BLOCK)
+
+CREATE = 'create'
+DELETE = 'delete'
+
+_SENT = 'sent'
+_RETRY = 'retry'
+_FAILED = 'failed'
+
+
+def _true(value):
+    return str(value).lower() in ('true', '1', 'yes', 'on', 't', 'y')
+
+
+def split_object_path(path):
+    parts = path.split('/', 4)
+    if len(parts) < 5 or parts[0] or not all(parts[1:]):
+        return None
+    return parts[2], parts[3], parts[4]
+
+
+def delete_at_from_headers(environ, now=None):
+    delete_at = environ.get('HTTP_X_DELETE_AT')
+    if delete_at:
+        return int(float(delete_at))
+
+    delete_after = environ.get('HTTP_X_DELETE_AFTER')
+    if delete_after:
+        return int((now if now is not None else time.time()) + float(delete_after))
+
+    return None
+
+
+class ExpirerQueue(object):
+    """Bounded buffer of expirer operations flushed to SCT in batches.
+
+    When the buffer is full ``drop_newest`` rejects the new operation,
+    ``drop_oldest`` discards the oldest queued one and ``block`` waits up to
+    ``block_timeout`` seconds before rejecting it. Operations that fail with a
+    connection error, 429 or 5xx are requeued up to ``max_retries`` times.
+    After that, or on any other 4xx, they are lost and counted in ``failed``.
+    """
+
+    def __init__(self, client, max_size=10000, batch_size=100, flush_interval=1.0,
+                 policy=DROP_NEWEST, block_timeout=0.05, concurrency=4, max_retries=3):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of: {}'.format(', '.join(POLICIES)))
+
+        self.client = client
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+
+        self._items = deque()
+        self._attempts = {}
+        self._cond = threading.Condition()
+        self._running = False
+        self._stopped = threading.Event()
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.failed = 0
+        self.retried = 0
+        self.flushes = 0
+        self.last_flush_latency = None
+        self.total_flush_latency = 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def put(self, operation, account, container, obj, date=None):
+        item = (operation, account, container, obj, date)
+
+        with self._cond:
+            if len(self._items) >= self.max_size:
+                if self.policy == DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                elif self.policy == DROP_NEWEST or not self._cond.wait_for(
+                        lambda: len(self._items) < self.max_size, self.block_timeout):
+                    self.dropped += 1
+                    return False
+
+            self._items.append(item)
+            self.enqueued += 1
+
+            if len(self._items) >= self.batch_size:
+                self._cond.notify_all()
+
+        return True
+
+    def _take(self):
+        with self._cond:
+            batch = [self._items.popleft()
+                     for _ in range(min(self.batch_size, len(self._items)))]
+            self._cond.notify_all()
+            return batch
+
+    def _send(self, item):
+        operation, account, container, obj, date = item
+
+        try:
+            if operation == CREATE:
+                response = self.client.expirer_create(account, container, obj, date)
+            else:
+                response = self.client.expirer_delete(account, container, obj)
+        except requests.exceptions.RequestException as err:
+            logger.warning('Expirer %s failed for %s/%s/%s: %s',
+                           operation, account, container, obj, err)
+            return _RETRY
+
+        if response.status_code >= 400:
+            logger.warning('Expirer %s failed for %s/%s/%s: %s',
+                           operation, account, container, obj, response.status_code)
+            if response.status_code == 429 or response.status_code >= 500:
+                return _RETRY
+            return _FAILED
+        return _SENT
+
+    def _requeue(self, items):
+        lost = 0
+
+        for item in reversed(items):
+            key = item[1:4]
+            attempts = self._attempts.get(key, 0) + 1
+
+            if attempts > self.max_retries or len(self._items) >= self.max_size:
+                self._attempts.pop(key, None)
+                logger.error('Expirer %s for %s/%s/%s lost after %s attempts',
+                             item[0], item[1], item[2], item[3], attempts)
+                lost += 1
+                continue
+
+            self._attempts[key] = attempts
+            self._items.appendleft(item)
+
+        return lost
+
+    def _flush(self):
+        batch = self._take()
+        if not batch:
+            return 0, 0
+
+        latest = OrderedDict()
+        for item in batch:
+            latest[item[1:4]] = item
+
+        start = time.monotonic()
+        try:
+            results = list(imap_ordered(self._send, latest.values(), workers=self.concurrency))
+        except Exception:
+            with self._cond:
+                self.failed += len(latest)
+            raise
+        latency = time.monotonic() - start
+
+        retry = []
+        with self._cond:
+            for item, result in zip(latest.values(), results):
+                if result == _RETRY:
+                    retry.append(item)
+                else:
+                    self._attempts.pop(item[1:4], None)
+
+            lost = self._requeue(retry)
+
+            self.flushes += 1
+            self.flushed += results.count(_SENT)
+            self.failed += results.count(_FAILED) + lost
+            self.retried += len(retry) - lost
+            self.last_flush_latency = latency
+            self.total_flush_latency += latency
+
+        return len(batch), len(retry) - lost
+
+    def flush(self):
+        return self._flush()[0]
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: len(self._items) >= self.batch_size or not self._running,
+                        self.flush_interval)
+                    running = self._running
+
+                # Back off until the next interval once operations are retried.
+                try:
+                    while True:
+                        taken, retried = self._flush()
+                        if taken < self.batch_size or retried:
+                            break
+                except Exception:
+                    logger.exception('Expirer queue flush failed')
+
+                if not running and not self._items:
+                    break
+        finally:
+            self._stopped.set()
+
+    def start(self):
+        if self._running:
+            return
+
+        self._running = True
+        self._stopped.clear()
+        green.spawn(self._run)
+
+    def close(self, timeout=None):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+        return self._stopped.wait(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._items),
+                'enqueued': self.enqueued,
+                'dropped': self.dropped,
+                'flushed': self.flushed,
+                'failed': self.failed,
+                'retried': self.retried,
+                'flushes': self.flushes,
+                'last_flush_latency': self.last_flush_latency,
+                'avg_flush_latency': (self.total_flush_latency / self.flushes
+                                      if self.flushes else None)
+            }
+
+
+class ExpirerMiddleware(object):
+    """Schedules SCT expirations for object writes off the request path.
+
+    Successful object PUT/POST requests carrying X-Delete-At or X-Delete-After
+    enqueue an ``expirer_create``; a POST with X-Remove-Delete-At enqueues an
+    ``expirer_delete``.
+    """
+
+    def __init__(self, app, conf, client=None, queue=None):
+        self.app = app
+        self.conf = conf
+
+        if queue is None:
+            if client is None:
+                hosts = [host.strip() for host in conf['sct_host'].split(',') if host.strip()]
+                client = SCTClient(
+                    hosts if len(hosts) > 1 else hosts[0],
+                    conf['sct_api_key'],
+                    timeout=float(conf.get('sct_timeout', 5)),
+                    cooperative=_true(conf.get('cooperative', green.is_cooperative()))
+                )
+
+            queue = ExpirerQueue(
+                client,
+                max_size=int(conf.get('queue_size', 10000)),
+                batch_size=int(conf.get('batch_size', 100)),
+                flush_interval=float(conf.get('flush_interval', 1.0)),
+                policy=conf.get('overflow_policy', DROP_NEWEST),
+                block_timeout=float(conf.get('block_timeout', 0.05)),
+                concurrency=int(conf.get('flush_concurrency', 4))
+            )
+            queue.start()
+
+        self.queue = queue
+
+    def _operation(self, environ):
+        method = environ.get('REQUEST_METHOD')
+        if method not in ('PUT', 'POST'):
+            return None
+
+        path = split_object_path(environ.get('PATH_INFO', ''))
+        if path is None:
+            return None
+
+        if method == 'POST' and environ.get('HTTP_X_REMOVE_DELETE_AT'):
+            return (DELETE,) + path + (None,)
+
+        try:
+            delete_at = delete_at_from_headers(environ)
+        except ValueError:
+            return None
+
+        if delete_at is None:
+            return None
+
+        return (CREATE,) + path + (time.strftime(DATE_FORMAT, time.gmtime(delete_at)),)
+
+    def __call__(self, environ, start_response):
+        operation = self._operation(environ)
+        if operation is None:
+            return self.app(environ, start_response)
+
+        def _start_response(status, headers, exc_info=None):
+            if status.startswith('2') and not self.queue.put(*operation):
+                logger.warning('Expirer queue full, dropping %s for %s/%s/%s', *operation[:4])
+            return start_response(status, headers, exc_info)
+
+        return self.app(environ, _start_response)
+
+    def stats(self):
+        return self.queue.stats()
+
+
+def filter_factory(global_conf, **local_conf):
+    conf = global_conf.copy()
+    conf.update(local_conf)
+
+    def expirer_filter(app):
+        return ExpirerMiddleware(app, conf)
+
+    return expirer_filter
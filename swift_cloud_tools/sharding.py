@@ -0,0 +1,317 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import requests
+import logging
+import json
+import zlib
+import os
+
+from swift_cloud_tools.concurrency import AdaptiveLimiter, imap_ordered
+from swift_cloud_tools.client import SCTClient
+
+logger = logging.getLogger('swift-cloud-tools')
+
+MANIFEST_FILE = 'manifest.json'
+OPERATIONS = ('create', 'delete')
+
+_worker = {}
+
+
+def shard_for(account, container, shards):
+    key = '{}/{}'.format(account, container).encode('utf-8')
+    return zlib.crc32(key) % shards
+
+
+def normalize_item(item):
+    if isinstance(item, dict):
+        return [item['account'], item['container'], item['object'], item.get('date')]
+
+    item = list(item)
+    if len(item) == 3:
+        item.append(None)
+    return item
+
+
+def read_manifest(path):
+    with open(path, 'r') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _atomic_write(path, content):
+    tmp_path = '{}.tmp'.format(path)
+
+    with open(tmp_path, 'w') as tmp:
+        tmp.write(content)
+        tmp.flush()
+        os.fsync(tmp.fileno())
+
+    os.replace(tmp_path, path)
+
+
+class Counters(object):
+
+    def __init__(self, processed=0, succeeded=0, failed=0, ctx=multiprocessing):
+        self._lock = ctx.Lock()
+        self._processed = ctx.RawValue('q', processed)
+        self._succeeded = ctx.RawValue('q', succeeded)
+        self._failed = ctx.RawValue('q', failed)
+
+    def add(self, succeeded=0, failed=0):
+        with self._lock:
+            self._processed.value += succeeded + failed
+            self._succeeded.value += succeeded
+            self._failed.value += failed
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'processed': self._processed.value,
+                'succeeded': self._succeeded.value,
+                'failed': self._failed.value
+            }
+
+
+class Shard(object):
+
+    def __init__(self, work_dir, index):
+        self.index = index
+        self.path = os.path.join(work_dir, 'shard-{:04d}.jsonl'.format(index))
+        self.checkpoint_path = os.path.join(work_dir, 'shard-{:04d}.ckpt'.format(index))
+        self.failed_path = os.path.join(work_dir, 'shard-{:04d}.failed.jsonl'.format(index))
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {'shard': self.index, 'offset': 0, 'succeeded': 0, 'failed': 0,
+                    'failed_offset': 0}
+
+        with open(self.checkpoint_path, 'r') as checkpoint:
+            return json.load(checkpoint)
+
+    def save_checkpoint(self, state):
+        _atomic_write(self.checkpoint_path, json.dumps(state))
+
+
+def _apply(client, operation, item):
+    account, container, obj, date = item
+
+    try:
+        if operation == 'create':
+            return client.expirer_create(account, container, obj, date).status_code
+        return client.expirer_delete(account, container, obj).status_code
+    except requests.exceptions.RequestException as err:
+        logger.warning('Expirer %s failed for %s/%s/%s: %s',
+                       operation, account, container, obj, err)
+        return None
+
+
+def process_shard(client, shard, operation='create', checkpoint_every=100, counters=None,
+                  concurrency=1):
+    state = shard.load_checkpoint()
+    pending = {'succeeded': 0, 'failed': 0}
+
+    def flush(offset, failed):
+        failed.flush()
+        os.fsync(failed.fileno())
+
+        state['offset'] = offset
+        state['failed_offset'] = failed.tell()
+        state['succeeded'] += pending['succeeded']
+        state['failed'] += pending['failed']
+        shard.save_checkpoint(state)
+
+        if counters is not None:
+            counters.add(pending['succeeded'], pending['failed'])
+
+        pending['succeeded'] = pending['failed'] = 0
+
+    def remaining(items):
+        for offset, line in enumerate(items, 1):
+            if offset > state['offset']:
+                yield json.loads(line)
+
+    with open(shard.path, 'r') as items, open(shard.failed_path, 'a') as failed:
+        # Drop failures written after the last checkpoint, they are replayed below.
+        if 'failed_offset' in state:
+            failed.truncate(state['failed_offset'])
+            failed.seek(state['failed_offset'])
+
+        offset = state['offset']
+        results = imap_ordered(
+            lambda item: (item, _apply(client, operation, item)),
+            remaining(items),
+            workers=concurrency
+        )
+
+        for (account, container, obj, date), status in results:
+            offset += 1
+
+            if status is not None and status < 400:
+                pending['succeeded'] += 1
+            else:
+                pending['failed'] += 1
+                failed.write('{}\n'.format(json.dumps({
+                    'account': account,
+                    'container': container,
+                    'object': obj,
+                    'date': date,
+                    'status': status
+                })))
+
+            if offset - state['offset'] >= checkpoint_every:
+                flush(offset, failed)
+
+        flush(offset, failed)
+
+    return state
+
+
+def _init_worker(sct_host, sct_api_key, counters, options):
+    limiter = None
+    if options['concurrency'] > 1:
+        limiter = AdaptiveLimiter(
+            initial=min(8, options['concurrency']), max_limit=options['concurrency'])
+
+    # Keep one pooled connection per in-flight request instead of urllib3's 10.
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(options['concurrency'], 10))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+
+    _worker['client'] = SCTClient(sct_host, sct_api_key, session=session, limiter=limiter)
+    _worker['counters'] = counters
+    _worker['options'] = options
+
+
+def _run_shard(args):
+    work_dir, index = args
+    options = _worker['options']
+
+    return process_shard(
+        _worker['client'],
+        Shard(work_dir, index),
+        operation=options['operation'],
+        checkpoint_every=options['checkpoint_every'],
+        counters=_worker['counters'],
+        concurrency=options['concurrency']
+    )
+
+
+class ShardedExpirer(object):
+
+    def __init__(self, sct_host, sct_api_key, work_dir, processes=None, shards=None,
+                 operation='create', checkpoint_every=100, progress_interval=5,
+                 concurrency=1):
+        if operation not in OPERATIONS:
+            raise ValueError('operation must be one of: {}'.format(', '.join(OPERATIONS)))
+
+        self.sct_host = sct_host
+        self.sct_api_key = sct_api_key
+        self.work_dir = work_dir
+        self.processes = processes or os.cpu_count() or 1
+        self.shards = shards or self.processes * 4
+        self.operation = operation
+        self.checkpoint_every = checkpoint_every
+        self.progress_interval = progress_interval
+        self.concurrency = concurrency
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.work_dir, MANIFEST_FILE)
+
+    def is_split(self):
+        return os.path.exists(self.manifest_path)
+
+    def split(self, manifest):
+        if self.is_split():
+            with open(self.manifest_path, 'r') as info:
+                return json.load(info)
+
+        os.makedirs(self.work_dir, exist_ok=True)
+
+        if isinstance(manifest, str):
+            manifest = read_manifest(manifest)
+
+        shards = [Shard(self.work_dir, index) for index in range(self.shards)]
+        files = [open('{}.tmp'.format(shard.path), 'w') for shard in shards]
+        total = 0
+
+        try:
+            for item in manifest:
+                item = normalize_item(item)
+                index = shard_for(item[0], item[1], self.shards)
+                files[index].write('{}\n'.format(json.dumps(item)))
+                total += 1
+        finally:
+            for shard_file in files:
+                shard_file.flush()
+                os.fsync(shard_file.fileno())
+                shard_file.close()
+
+        for shard in shards:
+            os.replace('{}.tmp'.format(shard.path), shard.path)
+
+        info = {'shards': self.shards, 'total': total}
+        _atomic_write(self.manifest_path, json.dumps(info))
+
+        return info
+
+    def run(self, manifest=None, progress=None):
+        if manifest is not None:
+            info = self.split(manifest)
+        elif self.is_split():
+            info = self.split(None)
+        else:
+            raise ValueError('manifest is required before the work dir is split')
+
+        shards = [Shard(self.work_dir, index) for index in range(info['shards'])]
+        previous = [shard.load_checkpoint() for shard in shards]
+
+        ctx = multiprocessing.get_context()
+        counters = Counters(
+            processed=sum(state['succeeded'] + state['failed'] for state in previous),
+            succeeded=sum(state['succeeded'] for state in previous),
+            failed=sum(state['failed'] for state in previous),
+            ctx=ctx
+        )
+        options = {
+            'operation': self.operation,
+            'checkpoint_every': self.checkpoint_every,
+            'concurrency': self.concurrency
+        }
+
+        with ctx.Pool(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(self.sct_host, self.sct_api_key, counters, options)
+        ) as pool:
+            result = pool.map_async(
+                _run_shard, [(self.work_dir, shard.index) for shard in shards], chunksize=1)
+
+            while not result.ready():
+                result.wait(self.progress_interval)
+                if progress is not None:
+                    progress(dict(counters.snapshot(), total=info['total']))
+
+            states = result.get()
+
+        summary = dict(counters.snapshot(), total=info['total'], shards=states)
+        logger.info('Expirer %s finished: %s processed, %s succeeded, %s failed',
+                    self.operation, summary['processed'], summary['succeeded'], summary['failed'])
+
+        return summary
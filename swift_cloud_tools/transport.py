@@ -0,0 +1,345 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from collections import deque
+
+import ipaddress
+import threading
+import requests
+import logging
+import socket
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from swift_cloud_tools.hedging import percentile
+from swift_cloud_tools import green
+
+try:
+    import dns.resolver
+except ImportError:
+    dns = None
+
+logger = logging.getLogger('swift-cloud-tools')
+
+_local = threading.local()
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+    except ValueError:
+        return False
+    return True
+
+
+class DNSCache(object):
+    """Caches resolved addresses per host and port.
+
+    With ``use_record_ttl`` and dnspython installed, hosts are resolved with
+    one A query (AAAA when there is no A record) and cached for the record
+    TTL. Otherwise, or when that query fails, getaddrinfo is used and the
+    entry lives ``ttl`` seconds. TTLs are clamped to ``min_ttl``/``max_ttl``.
+    A stale entry is served when a refresh fails.
+    """
+
+    def __init__(self, ttl=60, min_ttl=1, max_ttl=3600, use_record_ttl=True, lookup_timeout=1.0):
+        self.ttl = ttl
+        self.lookup_timeout = lookup_timeout
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.use_record_ttl = use_record_ttl and dns is not None
+
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def _resolve_records(self, host, port):
+        resolve = getattr(dns.resolver, 'resolve', None) or dns.resolver.query
+
+        for rdtype in ('A', 'AAAA'):
+            try:
+                answer = resolve(host, rdtype, lifetime=self.lookup_timeout)
+            except dns.resolver.NoAnswer:
+                continue
+            except Exception:
+                return None
+            return [(record.address, port) for record in answer], answer.rrset.ttl
+
+        return None
+
+    def _lookup(self, host, port):
+        if self.use_record_ttl:
+            result = self._resolve_records(host, port)
+            if result is not None:
+                return result
+
+        addresses = []
+        for info in socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM):
+            if info[4][:2] not in addresses:
+                addresses.append(info[4][:2])
+
+        return addresses, self.ttl
+
+    def resolve(self, host, port):
+        if _is_ip(host):
+            return [(host.strip('[]'), port)]
+
+        key = (host, port)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        try:
+            addresses, ttl = self._lookup(host, port)
+        except socket.gaierror:
+            if entry is None:
+                raise
+            with self._lock:
+                self.stale += 1
+            logger.warning('DNS lookup for %s failed, using cached addresses', host)
+            return entry[1]
+
+        ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, addresses)
+
+        return addresses
+
+    def invalidate(self, host=None):
+        with self._lock:
+            if host is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == host]:
+                    del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale
+            }
+
+
+class _CachedDNSConnection(object):
+
+    dns_cache = None
+
+    def _new_conn(self):
+        addresses = self.dns_cache.resolve(self.host, self.port)
+        dns_host = getattr(self, '_dns_host', self.host)
+        error = None
+
+        try:
+            for address, _ in addresses:
+                self._dns_host = address
+                try:
+                    sock = super(_CachedDNSConnection, self)._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as err:
+                    error = err
+                    continue
+
+                _local.cold = True
+                return sock
+        finally:
+            self._dns_host = dns_host
+
+        self.dns_cache.invalidate(self.host)
+        raise error
+
+
+def _pool_classes(dns_cache):
+    http_connection = type(
+        'CachedDNSHTTPConnection', (_CachedDNSConnection, HTTPConnection), {'dns_cache': dns_cache})
+    https_connection = type(
+        'CachedDNSHTTPSConnection', (_CachedDNSConnection, HTTPSConnection), {'dns_cache': dns_cache})
+
+    return {
+        'http': type('CachedDNSHTTPConnectionPool', (HTTPConnectionPool,),
+                     {'ConnectionCls': http_connection}),
+        'https': type('CachedDNSHTTPSConnectionPool', (HTTPSConnectionPool,),
+                      {'ConnectionCls': https_connection})
+    }
+
+
+class CachedDNSAdapter(HTTPAdapter):
+
+    def __init__(self, dns_cache, **kwargs):
+        self.dns_cache = dns_cache
+        super(CachedDNSAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(CachedDNSAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _pool_classes(self.dns_cache)
+
+    def send(self, request, *args, **kwargs):
+        _local.cold = False
+
+        try:
+            response = super(CachedDNSAdapter, self).send(request, *args, **kwargs)
+            response.cold = _local.cold
+        finally:
+            _local.cold = False
+
+        return response
+
+
+class WarmTransport(object):
+    """Session with cached DNS, pre-opened connections and keepalive pings.
+
+    ``warm`` resolves the host and opens ``connections`` pooled connections
+    (TCP and TLS) before the first call. With ``keepalive_interval`` set,
+    a background worker re-opens dropped connections and, when ``ping_path``
+    is set, sends a GET to it to keep idle connections from timing out.
+    Addresses are cached for the DNS record TTL, or ``dns_ttl`` seconds when
+    ``dns_record_ttl`` is off or dnspython is missing.
+    """
+
+    def __init__(self, connections=2, pool_size=10, dns_ttl=60, keepalive_interval=None,
+                 ping_path=None, background=False, window=1000, dns_cache=None,
+                 dns_record_ttl=True):
+        self.connections = min(connections, pool_size)
+        self.keepalive_interval = keepalive_interval
+        self.ping_path = ping_path
+        self.background = background
+
+        self.dns_cache = (dns_cache if dns_cache is not None
+                          else DNSCache(ttl=dns_ttl, use_record_ttl=dns_record_ttl))
+        self.adapter = CachedDNSAdapter(
+            self.dns_cache, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        self.session.hooks['response'].append(self._on_response)
+
+        self._lock = threading.Lock()
+        self._cold = deque(maxlen=window)
+        self._warm = deque(maxlen=window)
+        self._urls = []
+        self._stop = threading.Event()
+        self._keepalive = None
+
+        self.warmed = 0
+
+    def _on_response(self, response, *args, **kwargs):
+        cold = getattr(response, 'cold', False)
+
+        with self._lock:
+            (self._cold if cold else self._warm).append(response.elapsed.total_seconds())
+
+    def _connection_pool(self, url):
+        get_connection = getattr(self.adapter, 'get_connection_with_tls_context', None)
+        if get_connection is None:
+            return self.adapter.get_connection(url)
+
+        settings = self.session.merge_environment_settings(url, {}, None, None, None)
+        request = requests.Request('GET', url).prepare()
+        return get_connection(request, settings['verify'], cert=settings['cert'])
+
+    def _fill(self, url):
+        pool = self._connection_pool(url)
+        conns = []
+        opened = 0
+
+        try:
+            for _ in range(self.connections):
+                conn = pool._get_conn()
+                conns.append(conn)
+                if getattr(conn, 'sock', None) is None:
+                    conn.connect()
+                    opened += 1
+        finally:
+            for conn in conns:
+                pool._put_conn(conn)
+
+        return opened
+
+    def _warm_url(self, url):
+        try:
+            opened = self._fill(url)
+        except Exception as err:
+            logger.warning('Pre-warming connections to %s failed: %s', url, err)
+            return 0
+
+        with self._lock:
+            self.warmed += opened
+        return opened
+
+    def warm(self, url):
+        if url not in self._urls:
+            self._urls.append(url)
+
+        if self.background:
+            green.spawn(self._warm_url, url)
+        else:
+            self._warm_url(url)
+
+        if self.keepalive_interval and self._keepalive is None:
+            self._stop.clear()
+            self._keepalive = green.spawn(self._run_keepalive)
+
+    def ping(self):
+        for url in list(self._urls):
+            self._warm_url(url)
+
+            if self.ping_path is None:
+                continue
+
+            try:
+                self.session.get(
+                    '{}{}'.format(url.rstrip('/'), self.ping_path),
+                    timeout=self.keepalive_interval
+                ).close()
+            except requests.exceptions.RequestException as err:
+                logger.warning('Keepalive ping to %s failed: %s', url, err)
+
+    def _run_keepalive(self):
+        while not self._stop.wait(self.keepalive_interval):
+            self.ping()
+
+    def close(self):
+        self._stop.set()
+        self._keepalive = None
+        self.session.close()
+
+    def stats(self):
+        with self._lock:
+            cold = list(self._cold)
+            warm = list(self._warm)
+            warmed = self.warmed
+
+        return {
+            'warmed_connections': warmed,
+            'cold_calls': len(cold),
+            'warm_calls': len(warm),
+            'cold_p50': percentile(cold, 50),
+            'cold_p99': percentile(cold, 99),
+            'warm_p50': percentile(warm, 50),
+            'warm_p99': percentile(warm, 99),
+            'dns': self.dns_cache.stats()
+        }
@@ -0,0 +1,95 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+# Runs many green threads against a slow local SCT stub under eventlet or
+# gevent monkey patching and prints the timings as JSON:
+#
+#     python -m tests.green_harness eventlet|gevent [calls] [delay]
+
+import sys
+
+HUB = sys.argv[1]
+
+if HUB == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+else:
+    from gevent import monkey
+    monkey.patch_all()
+
+import json  # noqa: E402
+import time  # noqa: E402
+
+from swift_cloud_tools.concurrency import imap_ordered  # noqa: E402
+from swift_cloud_tools.client import SCTClient  # noqa: E402
+from swift_cloud_tools import green  # noqa: E402
+
+CALLS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+DELAY = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+
+
+def app(environ, start_response):
+    time.sleep(DELAY)
+    start_response('200 OK', [('Content-Type', 'application/json')])
+    return [json.dumps({'status': 'Migrando', 'progress': 93}).encode('utf-8')]
+
+
+def serve():
+    if HUB == 'eventlet':
+        from eventlet import wsgi
+        sock = eventlet.listen(('127.0.0.1', 0))
+        eventlet.spawn(wsgi.server, sock, app, log_output=False)
+        return sock.getsockname()[1]
+
+    from gevent.pywsgi import WSGIServer
+    server = WSGIServer(('127.0.0.1', 0), app, log=None)
+    server.start()
+    return server.server_port
+
+
+def main():
+    port = serve()
+    client = SCTClient('http://127.0.0.1:{}'.format(port), 'key', cooperative=True)
+    ticks = []
+    done = []
+
+    def ticker():
+        while not done:
+            ticks.append(time.monotonic())
+            time.sleep(0.01)
+
+    green.pool(1).spawn(ticker)
+
+    start = time.monotonic()
+    statuses = list(imap_ordered(
+        lambda index: client.transfer_status('project-{}'.format(index)).status_code,
+        range(CALLS),
+        workers=CALLS
+    ))
+    elapsed = time.monotonic() - start
+    done.append(True)
+
+    print(json.dumps({
+        'hub': green.hub(),
+        'green_dns': green.has_green_dns(),
+        'calls': CALLS,
+        'delay': DELAY,
+        'elapsed': elapsed,
+        'statuses': statuses,
+        'ticks': len(ticks)
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+
+from swift_cloud_tools.balancer import Host, HostPool
+from swift_cloud_tools.client import DEFAULT_TIMEOUT, SCTClient
+
+
+class TestBalancer(TestCase):
+
+    def setUp(self):
+        self.sct_hosts = [
+            'http://swift-cloud-tools-1.gcloud.dev.globoi.com',
+            'http://swift-cloud-tools-2.gcloud.dev.globoi.com'
+        ]
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+        self.headers = {
+            'Content-type': 'application/json',
+            'X-Auth-Token': self.sct_api_key
+        }
+
+    def _pool(self, statuses, **kwargs):
+        hosts = []
+        for url, status in zip(self.sct_hosts, statuses):
+            session = Mock()
+            if isinstance(status, Exception):
+                session.get.side_effect = status
+                session.post.side_effect = status
+            else:
+                response = Mock()
+                response.status_code = status
+                session.get.return_value = response
+                session.post.return_value = response
+            hosts.append(Host(url, session=session))
+
+        return HostPool(hosts, **kwargs)
+
+    def test_least_outstanding(self):
+        pool = self._pool([200, 200])
+        first, second = pool.hosts
+        pool.start(first)
+
+        self.assertIs(pool.choose(), second)
+        self.assertIs(pool.choose(exclude=[second]), first)
+        self.assertIsNone(pool.choose(exclude=[first, second]))
+
+    def test_ewma(self):
+        pool = self._pool([200, 200], strategy='ewma')
+        first, second = pool.hosts
+
+        for host, latency in ((first, 0.5), (second, 0.01)):
+            pool.start(host)
+            pool.finish(host, latency)
+
+        self.assertIs(pool.choose(), second)
+
+    def test_passive_ejection(self):
+        pool = self._pool([200, 200], failure_threshold=2)
+        first, second = pool.hosts
+
+        for _ in range(2):
+            pool.start(first)
+            pool.finish(first, 0.01, failed=True)
+
+        self.assertTrue(first.is_ejected())
+        for _ in range(5):
+            self.assertIs(pool.choose(), second)
+
+    def test_all_ejected_uses_soonest(self):
+        pool = self._pool([200, 200], failure_threshold=1)
+        first, second = pool.hosts
+
+        for host in (second, first):
+            pool.start(host)
+            pool.finish(host, 0.01, failed=True)
+
+        self.assertIs(pool.choose(), second)
+
+    def test_active_health_check(self):
+        pool = self._pool([503, 200], health_check_path='/healthcheck')
+        first, second = pool.hosts
+
+        pool.check()
+
+        self.assertTrue(first.is_ejected())
+        self.assertFalse(second.is_ejected())
+        first.session.get.assert_called_once_with(
+            '{}/healthcheck'.format(self.sct_hosts[0]), timeout=2)
+
+        first.session.get.return_value.status_code = 200
+        pool.check()
+        self.assertFalse(first.is_ejected())
+
+    def test_invalid_strategy(self):
+        with self.assertRaises(ValueError):
+            HostPool(self.sct_hosts, strategy='round_robin')
+
+    def test_client_fails_over_idempotent_calls(self):
+        pool = self._pool([requests.exceptions.ConnectionError(), 200])
+        first, second = pool.hosts
+        second.outstanding = 1
+        client = SCTClient(pool, self.sct_api_key)
+
+        response = client.transfer_status('64b10d56454c4b1eb91b46b62d27c8b2')
+
+        self.assertEqual(response.status_code, 200)
+        first.session.get.assert_called_once()
+        second.session.get.assert_called_once_with(
+            '{}/v1/transfer/status/64b10d56454c4b1eb91b46b62d27c8b2'.format(self.sct_hosts[1]),
+            headers=self.headers,
+            timeout=DEFAULT_TIMEOUT
+        )
+        self.assertEqual(first.failures, 1)
+
+    def test_client_fails_over_server_errors(self):
+        pool = self._pool([503, 200])
+        pool.hosts[1].outstanding = 1
+        client = SCTClient(pool, self.sct_api_key)
+
+        response = client.transfer_status_by_projects(['64b10d56454c4b1eb91b46b62d27c8b2'])
+
+        self.assertEqual(response.status_code, 200)
+        pool.hosts[1].session.post.assert_called_once_with(
+            '{}/v1/transfer/status'.format(self.sct_hosts[1]),
+            data=json.dumps(['64b10d56454c4b1eb91b46b62d27c8b2']),
+            headers=self.headers,
+            timeout=DEFAULT_TIMEOUT
+        )
+
+    def test_client_does_not_retry_non_idempotent_calls(self):
+        pool = self._pool([requests.exceptions.ConnectionError(), 201])
+        pool.hosts[1].outstanding = 1
+        client = SCTClient(pool, self.sct_api_key)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.transfer_create('64b10d56454c4b1eb91b46b62d27c8b2', 'alan', 'dev')
+
+        pool.hosts[1].session.post.assert_not_called()
+
+    def test_client_accepts_host_list(self):
+        client = SCTClient(self.sct_hosts, self.sct_api_key)
+
+        self.assertEqual(len(client.pool.hosts), 2)
+        self.assertEqual(client.sct_url, '{}/v1'.format(self.sct_hosts[0]))
+        self.assertIsNot(client.pool.hosts[0].session, client.pool.hosts[1].session)
+
+    def test_client_host_list_uses_session(self):
+        session = Mock()
+        session.get.return_value.status_code = 200
+        client = SCTClient(self.sct_hosts, self.sct_api_key, session=session)
+
+        client.transfer_status('64b10d56454c4b1eb91b46b62d27c8b2')
+
+        self.assertTrue(all(host.session is session for host in client.pool.hosts))
+        session.get.assert_called_once()
+
+    @patch('swift_cloud_tools.client.green')
+    def test_client_host_list_cooperative_sessions(self, mock_green):
+        sessions = [Mock(), Mock()]
+        mock_green.session.side_effect = sessions
+        client = SCTClient(self.sct_hosts, self.sct_api_key, cooperative=True)
+
+        mock_green.check_cooperative.assert_called_once()
+        self.assertEqual([host.session for host in client.pool.hosts], sessions)
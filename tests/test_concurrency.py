@@ -0,0 +1,155 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import math
+import time
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+
+from swift_cloud_tools.client import SCTClient
+from swift_cloud_tools.concurrency import AdaptiveLimiter, imap_ordered
+
+
+class TestAdaptiveLimiter(TestCase):
+
+    def setUp(self):
+        self.sct_host = 'http://swift-cloud-tools-dev.gcloud.dev.globoi.com'
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+
+    def _saturate(self, limiter, latency, dropped=False, rounds=1):
+        for _ in range(rounds):
+            slots = limiter.limit
+            for _ in range(slots):
+                limiter.acquire()
+            for _ in range(slots):
+                limiter.release(latency, dropped=dropped)
+
+    def test_additive_increase(self):
+        limiter = AdaptiveLimiter(initial=4, max_limit=10)
+        self._saturate(limiter, 0.01, rounds=40)
+
+        self.assertEqual(limiter.limit, 10)
+        self.assertEqual(limiter.stats()['drops'], 0)
+
+    def test_no_increase_when_underused(self):
+        limiter = AdaptiveLimiter(initial=4, max_limit=10)
+
+        for _ in range(50):
+            limiter.acquire()
+            limiter.release(0.01)
+
+        self.assertEqual(limiter.limit, 4)
+
+    def test_multiplicative_decrease_on_drop(self):
+        limiter = AdaptiveLimiter(initial=10, backoff=0.5)
+        limiter.acquire()
+        limiter.release(0.01, dropped=True)
+
+        self.assertEqual(limiter.limit, 5)
+        self.assertEqual(limiter.stats()['drops'], 1)
+
+    def test_decrease_on_latency_gradient(self):
+        limiter = AdaptiveLimiter(initial=10, backoff=0.5, tolerance=2.0)
+
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.001)
+        for _ in range(5):
+            limiter.acquire()
+            limiter.release(0.5)
+
+        stats = limiter.stats()
+        self.assertEqual(limiter.limit, 5)
+        self.assertEqual(stats['latency_decreases'], 1)
+        self.assertEqual(stats['drops'], 0)
+
+    def test_jitter_does_not_shrink_limit(self):
+        limiter = AdaptiveLimiter(initial=8, max_limit=64)
+        rand = random.Random(7)
+        clock = [0.0]
+
+        with patch('swift_cloud_tools.concurrency.time.monotonic', side_effect=lambda: clock[0]):
+            for _ in range(300):
+                slots = limiter.limit
+                for _ in range(slots):
+                    limiter.acquire()
+                for _ in range(slots):
+                    limiter.release(rand.lognormvariate(math.log(0.02), 0.4))
+                clock[0] += 0.02
+
+        stats = limiter.stats()
+        self.assertGreater(limiter.limit, 8)
+        self.assertEqual(stats['latency_decreases'], 0)
+        self.assertEqual(stats['drops'], 0)
+
+    def test_never_below_min_limit(self):
+        limiter = AdaptiveLimiter(initial=2, min_limit=1, backoff=0.1)
+
+        for _ in range(5):
+            limiter._last_decrease = 0.0
+            limiter.acquire()
+            limiter.release(0.01, dropped=True)
+
+        self.assertEqual(limiter.limit, 1)
+
+    def test_acquire_blocks_at_limit(self):
+        limiter = AdaptiveLimiter(initial=1, max_limit=1)
+
+        self.assertTrue(limiter.acquire())
+        self.assertFalse(limiter.acquire(timeout=0.01))
+        limiter.release(0.01)
+        self.assertTrue(limiter.acquire(timeout=0.01))
+
+    @patch('swift_cloud_tools.client.requests.post')
+    def test_client_reports_throttling(self, mock_request):
+        mock = Mock()
+        mock.status_code = 429
+        mock_request.return_value = mock
+
+        limiter = AdaptiveLimiter(initial=10, backoff=0.5)
+        client = SCTClient(self.sct_host, self.sct_api_key, limiter=limiter)
+        client.expirer_create('auth_1', 'container', 'object.jpeg', '2021-10-06 12:15:00')
+
+        self.assertEqual(limiter.limit, 5)
+        self.assertEqual(limiter.inflight, 0)
+
+    @patch('swift_cloud_tools.client.requests.get')
+    def test_client_releases_on_error(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+
+        limiter = AdaptiveLimiter(initial=10, backoff=0.5)
+        client = SCTClient(self.sct_host, self.sct_api_key, limiter=limiter)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.transfer_status('64b10d56454c4b1eb91b46b62d27c8b2')
+
+        self.assertEqual(limiter.inflight, 0)
+        self.assertEqual(limiter.stats()['drops'], 1)
+
+
+class TestImapOrdered(TestCase):
+
+    def test_preserves_order(self):
+        def slow(item):
+            time.sleep(random.random() / 100)
+            return item * 2
+
+        self.assertEqual(list(imap_ordered(slow, range(50), workers=8)), list(range(0, 100, 2)))
+
+    def test_sequential(self):
+        self.assertEqual(list(imap_ordered(str, range(3))), ['0', '1', '2'])
@@ -0,0 +1,148 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import requests
+
+from swift_cloud_tools.client import DEADLINE_HEADER, SCTClient
+from swift_cloud_tools.concurrency import AdaptiveLimiter
+from swift_cloud_tools.balancer import Host, HostPool
+from swift_cloud_tools.exceptions import DeadlineExceeded
+from swift_cloud_tools.deadline import Deadline
+
+
+class TestDeadline(TestCase):
+
+    def setUp(self):
+        self.sct_host = 'http://swift-cloud-tools-dev.gcloud.dev.globoi.com'
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+        self.project_id = '64b10d56454c4b1eb91b46b62d27c8b2'
+
+        self.client = SCTClient(
+            self.sct_host,
+            self.sct_api_key
+        )
+
+    def test_timeout_shrinks_to_remaining(self):
+        deadline = Deadline(0.3)
+
+        connect, read = deadline.timeout((3.05, 30))
+        self.assertLessEqual(connect, 0.3)
+        self.assertLessEqual(read, 0.3)
+        self.assertEqual(deadline.timeout(0.1), 0.1)
+        self.assertLessEqual(deadline.timeout(), 0.3)
+
+    def test_expired_deadline(self):
+        deadline = Deadline(0)
+
+        self.assertTrue(deadline.expired())
+        with self.assertRaises(DeadlineExceeded):
+            deadline.timeout(1)
+
+    def test_deadline_exceeded_is_a_timeout(self):
+        self.assertTrue(issubclass(DeadlineExceeded, requests.exceptions.Timeout))
+
+    @patch('swift_cloud_tools.client.requests.get')
+    def test_per_call_timeout(self, mock_request):
+        mock_request.return_value.status_code = 200
+        self.client.transfer_status(self.project_id, timeout=(1, 2))
+
+        self.assertEqual(mock_request.call_args[1]['timeout'], (1, 2))
+        self.assertNotIn(DEADLINE_HEADER, mock_request.call_args[1]['headers'])
+
+    @patch('swift_cloud_tools.client.requests.get')
+    def test_deadline_is_propagated(self, mock_request):
+        mock_request.return_value.status_code = 200
+        self.client.transfer_status(self.project_id, deadline=0.3)
+
+        kwargs = mock_request.call_args[1]
+        self.assertLessEqual(kwargs['timeout'][1], 0.3)
+        self.assertLessEqual(int(kwargs['headers'][DEADLINE_HEADER]), 300)
+
+    @patch('swift_cloud_tools.client.requests.post')
+    def test_client_default_deadline(self, mock_request):
+        client = SCTClient(self.sct_host, self.sct_api_key, deadline=0)
+
+        with self.assertRaises(DeadlineExceeded):
+            client.expirer_create('auth_1', 'container', 'object.jpeg', '2021-10-06 12:15:00')
+
+        mock_request.assert_not_called()
+
+    @patch('swift_cloud_tools.client.requests.get')
+    def test_timeout_after_deadline_raises_deadline_exceeded(self, mock_request):
+        def slow(*args, **kwargs):
+            time.sleep(0.02)
+            raise requests.exceptions.ReadTimeout()
+
+        mock_request.side_effect = slow
+
+        with self.assertRaises(DeadlineExceeded):
+            self.client.transfer_get(self.project_id, deadline=0.01)
+
+    def test_failover_respects_deadline(self):
+        sessions = [Mock(), Mock()]
+
+        def slow(*args, **kwargs):
+            time.sleep(0.02)
+            raise requests.exceptions.ConnectionError()
+
+        sessions[0].get.side_effect = slow
+        pool = HostPool([Host('http://sct-1', session=sessions[0]),
+                         Host('http://sct-2', session=sessions[1])])
+        pool.hosts[1].outstanding = 1
+        client = SCTClient(pool, self.sct_api_key)
+
+        with self.assertRaises(DeadlineExceeded):
+            client.transfer_status(self.project_id, deadline=Deadline(0.01))
+
+        sessions[1].get.assert_not_called()
+
+    def test_waiting_for_a_slot_does_not_eject_host(self):
+        session = Mock()
+        pool = HostPool([Host('http://sct-1', session=session)], failure_threshold=3)
+        limiter = AdaptiveLimiter(initial=1, max_limit=1)
+        client = SCTClient(pool, self.sct_api_key, limiter=limiter)
+        limiter.acquire()
+
+        for _ in range(3):
+            with self.assertRaises(DeadlineExceeded):
+                client.transfer_status(self.project_id, deadline=0.01)
+
+        host = pool.hosts[0]
+        self.assertEqual((host.requests, host.failures, host.outstanding), (0, 0, 0))
+        self.assertFalse(host.is_ejected())
+        session.get.assert_not_called()
+
+    def test_deadline_timeout_does_not_eject_host(self):
+        session = Mock()
+
+        def slow(*args, **kwargs):
+            time.sleep(0.02)
+            raise requests.exceptions.ReadTimeout()
+
+        session.get.side_effect = slow
+        pool = HostPool([Host('http://sct-1', session=session)], failure_threshold=3)
+        client = SCTClient(pool, self.sct_api_key)
+
+        for _ in range(3):
+            with self.assertRaises(DeadlineExceeded):
+                client.transfer_status(self.project_id, deadline=0.01)
+
+        host = pool.hosts[0]
+        self.assertEqual((host.requests, host.failures, host.outstanding), (3, 0, 0))
+        self.assertFalse(host.is_ejected())
@@ -17,7 +17,7 @@ import json
 from unittest import TestCase
 from unittest.mock import Mock, MagicMock, patch
 
-from swift_cloud_tools.client import SCTClient
+from swift_cloud_tools.client import DEFAULT_TIMEOUT, SCTClient
 
 
 class TestExpirer(TestCase):
@@ -62,7 +62,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -103,7 +104,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -139,7 +141,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -175,7 +178,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -209,7 +213,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -243,7 +248,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -277,7 +283,8 @@ class TestExpirer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/expirer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -0,0 +1,68 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import importlib.util
+import subprocess
+import json
+import sys
+import os
+
+from unittest import TestCase, skipUnless
+
+from swift_cloud_tools.exceptions import SCTClientException
+from swift_cloud_tools.client import SCTClient
+from swift_cloud_tools import green
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _installed(name):
+    return importlib.util.find_spec(name) is not None
+
+
+class TestGreen(TestCase):
+
+    def _harness(self, hub, calls=50, delay=0.2):
+        output = subprocess.check_output(
+            [sys.executable, '-m', 'tests.green_harness', hub, str(calls), str(delay)],
+            cwd=ROOT,
+            timeout=60
+        )
+        return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+    def _assert_concurrent(self, result):
+        self.assertEqual(result['statuses'], [200] * result['calls'])
+        self.assertLess(result['elapsed'], result['calls'] * result['delay'] / 5)
+        self.assertGreater(result['ticks'], result['elapsed'] / 0.01 / 4)
+
+    def test_not_cooperative_without_monkey_patching(self):
+        self.assertIsNone(green.hub())
+        self.assertIsNone(green.pool(10))
+
+        with self.assertRaises(SCTClientException):
+            SCTClient('http://swift-cloud-tools-dev.gcloud.dev.globoi.com', 'key', cooperative=True)
+
+    @skipUnless(_installed('eventlet'), 'eventlet is not installed')
+    def test_eventlet_concurrent_calls(self):
+        result = self._harness('eventlet')
+
+        self.assertEqual(result['hub'], 'eventlet')
+        self._assert_concurrent(result)
+
+    @skipUnless(_installed('gevent'), 'gevent is not installed')
+    def test_gevent_concurrent_calls(self):
+        result = self._harness('gevent')
+
+        self.assertEqual(result['hub'], 'gevent')
+        self._assert_concurrent(result)
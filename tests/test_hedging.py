@@ -0,0 +1,165 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import time
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from swift_cloud_tools.client import SCTClient
+from swift_cloud_tools.hedging import Hedger, percentile
+
+
+class SlowFirst(object):
+
+    def __init__(self, slow=0.3):
+        self.slow = slow
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+
+        if call == 1:
+            time.sleep(self.slow)
+            return Mock(name='primary')
+        return Mock(name='hedge')
+
+
+class TestHedging(TestCase):
+
+    def setUp(self):
+        self.sct_host = 'http://swift-cloud-tools-dev.gcloud.dev.globoi.com'
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+
+    def test_percentile(self):
+        self.assertIsNone(percentile([], 95))
+        self.assertEqual(percentile(list(range(101)), 95), 95)
+
+    def test_fast_call_is_not_hedged(self):
+        hedger = Hedger(delay=0.5, max_ratio=1)
+        func = Mock(return_value='ok')
+
+        self.assertEqual(hedger.call(func), 'ok')
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual(hedger.stats()['hedges'], 0)
+
+    def test_hedge_wins_slow_primary(self):
+        hedger = Hedger(delay=0.01, max_ratio=1)
+        func = SlowFirst()
+
+        start = time.monotonic()
+        result = hedger.call(func)
+
+        self.assertLess(time.monotonic() - start, func.slow)
+        self.assertEqual(result._mock_name, 'hedge')
+        self.assertEqual(func.calls, 2)
+
+        hedger.shutdown(wait=True)
+        stats = hedger.stats()
+        self.assertEqual(stats['hedges'], 1)
+        self.assertEqual(stats['hedge_wins'], 1)
+        self.assertGreater(stats['time_saved'], 0)
+
+    def test_hedge_ratio_is_capped(self):
+        hedger = Hedger(delay=0.01, max_ratio=0)
+        func = SlowFirst(slow=0.05)
+
+        self.assertEqual(hedger.call(func)._mock_name, 'primary')
+        self.assertEqual(func.calls, 1)
+
+    def test_concurrent_calls_are_not_queued(self):
+        hedger = Hedger(delay=1.0, max_ratio=1)
+        results = []
+
+        def call():
+            results.append(hedger.call(lambda: time.sleep(0.2) or 'ok'))
+
+        threads = [threading.Thread(target=call) for _ in range(64)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.monotonic() - start, 0.6)
+        self.assertEqual(results, ['ok'] * 64)
+        self.assertEqual(hedger.stats()['hedges'], 0)
+
+    def test_observed_delay(self):
+        hedger = Hedger(min_samples=3)
+        self.assertIsNone(hedger.hedge_delay())
+
+        for _ in range(3):
+            hedger.call(lambda: 'ok')
+
+        self.assertIsNotNone(hedger.hedge_delay())
+
+    def test_observed_delay_is_cached(self):
+        hedger = Hedger(min_samples=3, refresh_every=5)
+
+        for latency in (0.01, 0.02, 0.03):
+            hedger._record(latency, latency)
+        delay = hedger.hedge_delay()
+
+        for _ in range(4):
+            hedger._record(1.0, 1.0)
+        self.assertEqual(hedger.hedge_delay(), delay)
+
+        hedger._record(1.0, 1.0)
+        self.assertEqual(hedger.hedge_delay(), 1.0)
+
+    def test_delay_is_per_endpoint(self):
+        hedger = Hedger(min_samples=3)
+
+        for _ in range(3):
+            hedger._record(2.0, 2.0, 'transfer_status_all')
+            hedger._record(0.01, 0.01, 'transfer_status')
+
+        self.assertEqual(hedger.hedge_delay('transfer_status_all'), 2.0)
+        self.assertEqual(hedger.hedge_delay('transfer_status'), 0.01)
+        self.assertIsNone(hedger.hedge_delay('transfer_get'))
+
+    def test_failed_hedge_falls_back_to_primary(self):
+        hedger = Hedger(delay=0.01, max_ratio=1)
+        calls = []
+
+        def func():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return 'primary'
+            raise IOError('hedge failed')
+
+        self.assertEqual(hedger.call(func), 'primary')
+
+    @patch('swift_cloud_tools.client.requests.post')
+    @patch('swift_cloud_tools.client.requests.get')
+    def test_client_hedges_only_reads(self, mock_get, mock_post):
+        hedger = Mock()
+        mock_get.return_value.status_code = 200
+        mock_post.return_value.status_code = 201
+        hedger.call.side_effect = lambda func, endpoint: func()
+        client = SCTClient(self.sct_host, self.sct_api_key, hedger=hedger)
+
+        client.transfer_status('64b10d56454c4b1eb91b46b62d27c8b2')
+        client.transfer_create('64b10d56454c4b1eb91b46b62d27c8b2', 'alan', 'dev')
+
+        self.assertEqual(hedger.call.call_count, 1)
+        self.assertEqual(hedger.call.call_args[1]['endpoint'], 'transfer_status')
+        mock_get.assert_called_once()
+        mock_post.assert_called_once()
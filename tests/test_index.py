@@ -0,0 +1,132 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+from swift_cloud_tools.index import (
+    STATUS_COMPLETED, STATUS_RUNNING, STATUS_WAITING, TransferRecord, TransferStatusIndex
+)
+
+
+def _item(index, environment='dev', initial_date='', final_date=''):
+    return {
+        'id': index,
+        'project_id': 'project-{}'.format(index),
+        'project_name': 'name-{}'.format(index),
+        'environment': environment,
+        'container_count_swift': 1,
+        'object_count_swift': 10,
+        'bytes_used_swift': 100,
+        'last_object': '',
+        'count_error': 0,
+        'container_count_gcp': 1,
+        'object_count_gcp': 5,
+        'bytes_used_gcp': 50,
+        'initial_date': initial_date,
+        'final_date': final_date
+    }
+
+
+def _response(content):
+    mock = Mock()
+    mock.status_code = 200
+    mock.json.return_value = content
+    return mock
+
+
+class TestTransferStatusIndex(TestCase):
+
+    def setUp(self):
+        self.items = [
+            _item(1, 'dev'),
+            _item(2, 'dev', '2021-10-07 11:00:00'),
+            _item(3, 'prod', '2021-10-07 10:00:00'),
+            _item(4, 'prod', '2021-10-07 11:05:00', '2021-10-07 11:29:00'),
+            _item(5, 'qa', '2021-10-07 09:00:00', '2021-10-07 09:01:00')
+        ]
+        pages = [self.items[:2], self.items[2:4], self.items[4:]]
+
+        self.client = Mock()
+        self.client.transfer_status_all.side_effect = lambda page, per_page: _response({
+            'page': page,
+            'per_page': per_page,
+            'pages': len(pages),
+            'total': len(self.items),
+            'items': pages[page - 1]
+        })
+
+        self.index = TransferStatusIndex(self.client, per_page=2, batch_size=2)
+        self.index.load()
+
+    def test_record_status(self):
+        self.assertEqual(TransferRecord(_item(1)).status, STATUS_WAITING)
+        self.assertEqual(TransferRecord(_item(1, initial_date='2021-10-07 11:00:00')).status,
+                         STATUS_RUNNING)
+
+        record = TransferRecord(_item(1, initial_date='2021-10-07 11:00:00',
+                                      final_date='2021-10-07 11:30:00'))
+        self.assertEqual(record.status, STATUS_COMPLETED)
+        self.assertEqual(record.duration, 1800)
+        self.assertEqual(record.progress, 100)
+
+    def test_load_pages(self):
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.client.transfer_status_all.call_count, 3)
+        self.assertIn('project-3', self.index)
+        self.assertEqual(self.index.get('project-2').progress, 50)
+
+    def test_filter(self):
+        running = self.index.filter(status=STATUS_RUNNING, environment='prod')
+        self.assertEqual([record.project_id for record in running], ['project-3'])
+
+        self.assertEqual(len(self.index.filter(environment='dev')), 2)
+        self.assertEqual(len(self.index.filter(predicate=lambda record: record.active)), 3)
+        self.assertEqual(self.index.filter(environment='unknown'), [])
+
+    def test_top(self):
+        slowest = self.index.top(2, status=STATUS_COMPLETED)
+        self.assertEqual([record.project_id for record in slowest], ['project-4', 'project-5'])
+
+        fastest = self.index.top(1, largest=False, status=STATUS_COMPLETED)
+        self.assertEqual(fastest[0].project_id, 'project-5')
+
+    def test_aggregates(self):
+        self.assertEqual(self.index.count_by('status'), {
+            STATUS_WAITING: 1, STATUS_RUNNING: 2, STATUS_COMPLETED: 2
+        })
+        self.assertEqual(self.index.count_by('environment', status=STATUS_RUNNING),
+                         {'dev': 1, 'prod': 1})
+        self.assertEqual(self.index.aggregate('bytes_used_swift', environment='prod'), 200)
+
+    def test_incremental_refresh(self):
+        self.client.transfer_status_by_projects.side_effect = lambda ids: _response([
+            _item(2, 'dev', '2021-10-07 11:00:00', '2021-10-07 12:00:00')
+        ] if 'project-2' in ids else [])
+
+        self.index.refresh()
+
+        requested = [call[0][0] for call in self.client.transfer_status_by_projects.call_args_list]
+        self.assertEqual(sorted(sum(requested, [])), ['project-1', 'project-2', 'project-3'])
+        self.assertTrue(all(len(ids) <= 2 for ids in requested))
+        self.assertEqual(self.client.transfer_status_all.call_count, 3)
+        self.assertEqual(self.index.get('project-2').status, STATUS_COMPLETED)
+        self.assertEqual(len(self.index.filter(status=STATUS_RUNNING)), 1)
+
+    def test_periodic_full_refresh(self):
+        self.index.full_refresh_every = 1
+        self.index.refresh()
+
+        self.assertEqual(self.client.transfer_status_all.call_count, 6)
+        self.client.transfer_status_by_projects.assert_not_called()
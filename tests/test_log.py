@@ -0,0 +1,151 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import threading
+import logging
+import queue
+
+from unittest import TestCase
+from unittest.mock import MagicMock, Mock, patch
+
+import requests
+
+from swift_cloud_tools.log import NonBlockingQueueHandler, RequestLogger, setup_async_logging
+from swift_cloud_tools.client import SCTClient
+
+
+class ListHandler(logging.Handler):
+
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        record.emitted_by = threading.get_ident()
+        self.records.append(record)
+
+
+class TestRequestLogger(TestCase):
+
+    def setUp(self):
+        self.sct_host = 'http://swift-cloud-tools-dev.gcloud.dev.globoi.com'
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+        self.url = '{}/v1/transfer/status/64b10d56454c4b1eb91b46b62d27c8b2'.format(self.sct_host)
+
+        self.handler = ListHandler()
+        self.logger = logging.getLogger('swift-cloud-tools.test-log')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def test_success_is_sampled(self):
+        request_logger = RequestLogger(self.logger, success_rate=0.5, rand=Mock(side_effect=[0.9, 0.1]))
+
+        request_logger.log('get', self.url, 200, 0.01)
+        request_logger.log('get', self.url, 200, 0.01)
+
+        self.assertEqual(len(self.handler.records), 1)
+        record = self.handler.records[0]
+        self.assertEqual(record.levelno, logging.INFO)
+        self.assertEqual(record.sct['kind'], 'sampled')
+        self.assertEqual(record.sct['status'], 200)
+        self.assertEqual(record.getMessage(), 'SCT GET {} 200 10.0ms'.format(self.url))
+
+    def test_errors_and_slow_calls_are_always_logged(self):
+        rand = Mock(return_value=0.99)
+        request_logger = RequestLogger(self.logger, success_rate=0.01, slow_threshold=0.5, rand=rand)
+
+        request_logger.log('post', self.url, 503, 0.01)
+        request_logger.log('get', self.url, elapsed=0.01, error=requests.exceptions.ConnectionError())
+        request_logger.log('get', self.url, 200, 0.6)
+
+        self.assertEqual([record.sct['kind'] for record in self.handler.records],
+                         ['error', 'error', 'slow'])
+        self.assertTrue(all(record.levelno == logging.WARNING for record in self.handler.records))
+        rand.assert_not_called()
+
+    def test_disabled_level_skips_sampling(self):
+        self.logger.setLevel(logging.WARNING)
+        rand = Mock(return_value=0.0)
+
+        RequestLogger(self.logger, success_rate=1, rand=rand).log('get', self.url, 200, 0.01)
+        RequestLogger(self.logger, success_rate=0.5, rand=rand).log('get', self.url, 200, 0.01)
+
+        self.assertEqual(self.handler.records, [])
+        rand.assert_not_called()
+
+    def test_queue_handler_does_not_format(self):
+        record_queue = queue.Queue(1)
+        handler = NonBlockingQueueHandler(record_queue)
+        args = (MagicMock(),)
+
+        handler.handle(logging.LogRecord('sct', logging.INFO, __file__, 1, '%s', args, None))
+        handler.handle(logging.LogRecord('sct', logging.INFO, __file__, 1, '%s', args, None))
+
+        record = record_queue.get_nowait()
+        self.assertIs(record.args, args)
+        args[0].__str__.assert_not_called()
+        self.assertEqual(handler.dropped, 1)
+
+    def test_setup_async_logging(self):
+        self.logger.removeHandler(self.handler)
+        listener = setup_async_logging(handlers=[self.handler], logger=self.logger)
+
+        try:
+            RequestLogger(self.logger).log('get', self.url, 500, 0.01)
+        finally:
+            listener.stop()
+
+        queue_handlers = [handler for handler in self.logger.handlers
+                          if isinstance(handler, NonBlockingQueueHandler)]
+        self.assertEqual(len(queue_handlers), 1)
+        self.assertEqual(len(self.handler.records), 1)
+        self.logger.removeHandler(queue_handlers[0])
+
+    def test_setup_async_logging_stops_propagation(self):
+        parent = logging.getLogger('swift-cloud-tools.test-log-parent')
+        child = logging.getLogger('swift-cloud-tools.test-log-parent.child')
+        parent.propagate = False
+        parent.addHandler(self.handler)
+        child.setLevel(logging.INFO)
+        self.addCleanup(parent.removeHandler, self.handler)
+
+        listener = setup_async_logging(logger=child)
+        self.addCleanup(child.removeHandler, child.handlers[0])
+        self.addCleanup(setattr, child, 'propagate', True)
+
+        try:
+            child.info('hello')
+        finally:
+            listener.stop()
+
+        self.assertFalse(child.propagate)
+        self.assertEqual(len(self.handler.records), 1)
+        self.assertNotEqual(self.handler.records[0].emitted_by, threading.get_ident())
+
+    @patch('swift_cloud_tools.client.requests.get')
+    def test_client_logs_requests(self, mock_request):
+        mock_request.side_effect = requests.exceptions.ConnectionError()
+        request_logger = Mock()
+        client = SCTClient(self.sct_host, self.sct_api_key, request_logger=request_logger)
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client.transfer_status('64b10d56454c4b1eb91b46b62d27c8b2')
+
+        args, kwargs = request_logger.log.call_args
+        self.assertEqual(args, ('get', self.url))
+        self.assertIs(kwargs['error'], mock_request.side_effect)
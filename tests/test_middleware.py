@@ -0,0 +1,226 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+
+from unittest import TestCase
+from unittest.mock import Mock
+
+import requests
+
+from swift_cloud_tools.middleware import (
+    BLOCK, CREATE, DELETE, DROP_NEWEST, DROP_OLDEST, ExpirerMiddleware, ExpirerQueue,
+    delete_at_from_headers, filter_factory, split_object_path
+)
+
+
+def _app(status):
+    def app(environ, start_response):
+        start_response(status, [('Content-Length', '0')])
+        return [b'']
+    return app
+
+
+class TestExpirerMiddleware(TestCase):
+
+    def setUp(self):
+        self.sct_host = 'http://swift-cloud-tools-dev.gcloud.dev.globoi.com'
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+        self.account = 'AUTH_792079638c6441bca02071501f4eb273'
+        self.path = '/v1/{}/container/dir/object.jpeg'.format(self.account)
+
+        response = Mock()
+        response.status_code = 201
+        self.client = Mock()
+        self.client.expirer_create.return_value = response
+        self.client.expirer_delete.return_value = response
+
+    def _environ(self, method='PUT', path=None, **headers):
+        environ = {'REQUEST_METHOD': method, 'PATH_INFO': path or self.path}
+        for name, value in headers.items():
+            environ['HTTP_{}'.format(name.upper())] = value
+        return environ
+
+    def _call(self, middleware, environ):
+        start_response = Mock()
+        body = middleware(environ, start_response)
+        start_response.assert_called_once()
+        return body
+
+    def test_split_object_path(self):
+        self.assertEqual(split_object_path(self.path),
+                         (self.account, 'container', 'dir/object.jpeg'))
+        self.assertIsNone(split_object_path('/v1/{}/container'.format(self.account)))
+        self.assertIsNone(split_object_path('/v1/{}//object'.format(self.account)))
+
+    def test_delete_at_from_headers(self):
+        self.assertEqual(delete_at_from_headers({'HTTP_X_DELETE_AT': '1633522500'}), 1633522500)
+        self.assertEqual(delete_at_from_headers({'HTTP_X_DELETE_AFTER': '60'}, now=1000), 1060)
+        self.assertIsNone(delete_at_from_headers({}))
+
+    def test_put_with_delete_at_is_enqueued(self):
+        queue = ExpirerQueue(self.client)
+        middleware = ExpirerMiddleware(_app('201 Created'), {}, queue=queue)
+
+        self._call(middleware, self._environ(x_delete_at='1633522500'))
+
+        self.assertEqual(len(queue), 1)
+        self.assertEqual(queue._items[0], (
+            CREATE, self.account, 'container', 'dir/object.jpeg', '2021-10-06 12:15:00'))
+        self.client.expirer_create.assert_not_called()
+
+    def test_post_remove_delete_at(self):
+        queue = ExpirerQueue(self.client)
+        middleware = ExpirerMiddleware(_app('202 Accepted'), {}, queue=queue)
+
+        self._call(middleware, self._environ('POST', x_remove_delete_at='1'))
+
+        self.assertEqual(queue._items[0][0], DELETE)
+
+    def test_ignored_requests(self):
+        queue = ExpirerQueue(self.client)
+
+        self._call(ExpirerMiddleware(_app('404 Not Found'), {}, queue=queue),
+                   self._environ(x_delete_at='1633522500'))
+        self._call(ExpirerMiddleware(_app('200 OK'), {}, queue=queue),
+                   self._environ('GET', x_delete_at='1633522500'))
+        self._call(ExpirerMiddleware(_app('201 Created'), {}, queue=queue),
+                   self._environ(path='/v1/{}/container'.format(self.account),
+                                 x_delete_at='1633522500'))
+        self._call(ExpirerMiddleware(_app('201 Created'), {}, queue=queue),
+                   self._environ(x_delete_at='invalid'))
+        self._call(ExpirerMiddleware(_app('201 Created'), {}, queue=queue), self._environ())
+
+        self.assertEqual(len(queue), 0)
+
+    def test_drop_newest(self):
+        queue = ExpirerQueue(self.client, max_size=2, policy=DROP_NEWEST)
+
+        results = [queue.put(CREATE, 'a', 'c', str(index)) for index in range(3)]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual([item[3] for item in queue._items], ['0', '1'])
+        self.assertEqual(queue.stats()['dropped'], 1)
+
+    def test_drop_oldest(self):
+        queue = ExpirerQueue(self.client, max_size=2, policy=DROP_OLDEST)
+
+        for index in range(3):
+            self.assertTrue(queue.put(CREATE, 'a', 'c', str(index)))
+
+        self.assertEqual([item[3] for item in queue._items], ['1', '2'])
+        self.assertEqual(queue.stats()['dropped'], 1)
+
+    def test_block_times_out(self):
+        queue = ExpirerQueue(self.client, max_size=1, policy=BLOCK, block_timeout=0.01)
+
+        self.assertTrue(queue.put(CREATE, 'a', 'c', 'o'))
+        self.assertFalse(queue.put(CREATE, 'a', 'c', 'o2'))
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            ExpirerQueue(self.client, policy='shed')
+
+    def test_flush_coalesces_batch(self):
+        queue = ExpirerQueue(self.client, batch_size=10)
+        queue.put(CREATE, 'a', 'c', 'o', '2021-10-06 12:15:00')
+        queue.put(DELETE, 'a', 'c', 'o')
+        queue.put(CREATE, 'a', 'c', 'o2', '2021-10-06 12:15:00')
+
+        self.assertEqual(queue.flush(), 3)
+
+        self.client.expirer_delete.assert_called_once_with('a', 'c', 'o')
+        self.client.expirer_create.assert_called_once_with('a', 'c', 'o2', '2021-10-06 12:15:00')
+        stats = queue.stats()
+        self.assertEqual(stats['depth'], 0)
+        self.assertEqual(stats['flushed'], 2)
+        self.assertEqual(stats['flushes'], 1)
+        self.assertIsNotNone(stats['avg_flush_latency'])
+
+    def test_flush_counts_failures(self):
+        self.client.expirer_create.side_effect = requests.exceptions.ConnectionError()
+        queue = ExpirerQueue(self.client, max_retries=1)
+        queue.put(CREATE, 'a', 'c', 'o', '2021-10-06 12:15:00')
+
+        queue.flush()
+        stats = queue.stats()
+        self.assertEqual((stats['depth'], stats['retried'], stats['failed']), (1, 1, 0))
+
+        queue.flush()
+        stats = queue.stats()
+        self.assertEqual((stats['depth'], stats['retried'], stats['failed']), (0, 1, 1))
+        self.assertEqual(self.client.expirer_create.call_count, 2)
+
+    def test_retry_succeeds(self):
+        self.client.expirer_delete.side_effect = [Mock(status_code=503), Mock(status_code=204)]
+        queue = ExpirerQueue(self.client)
+        queue.put(DELETE, 'a', 'c', 'o')
+
+        queue.flush()
+        queue.flush()
+
+        stats = queue.stats()
+        self.assertEqual((stats['flushed'], stats['retried'], stats['failed']), (1, 1, 0))
+        self.assertEqual(queue._attempts, {})
+
+    def test_flush_counts_client_errors(self):
+        self.client.expirer_create.return_value = Mock(status_code=401)
+        queue = ExpirerQueue(self.client)
+        queue.put(CREATE, 'a', 'c', 'o', '2021-10-06 12:15:00')
+
+        queue.flush()
+
+        stats = queue.stats()
+        self.assertEqual((stats['flushed'], stats['failed']), (0, 1))
+
+    def test_background_flush(self):
+        queue = ExpirerQueue(self.client, batch_size=2, flush_interval=0.01)
+        queue.start()
+
+        for index in range(5):
+            queue.put(CREATE, 'a', 'c', str(index), '2021-10-06 12:15:00')
+
+        self.assertTrue(queue.close(timeout=5))
+        self.assertEqual(self.client.expirer_create.call_count, 5)
+        self.assertEqual(queue.stats()['depth'], 0)
+
+    def test_background_flush_survives_errors(self):
+        self.client.expirer_create.side_effect = [ValueError('boom'), Mock(status_code=201)]
+        queue = ExpirerQueue(self.client, batch_size=1, flush_interval=0.01, concurrency=1)
+
+        with self.assertLogs('swift-cloud-tools', 'ERROR'):
+            queue.start()
+            queue.put(CREATE, 'a', 'c', 'o', '2021-10-06 12:15:00')
+            for _ in range(500):
+                if queue.stats()['failed']:
+                    break
+                time.sleep(0.01)
+
+        queue.put(CREATE, 'a', 'c', 'o2', '2021-10-06 12:15:00')
+        self.assertTrue(queue.close(timeout=5))
+
+        stats = queue.stats()
+        self.assertEqual((stats['depth'], stats['flushed'], stats['failed']), (0, 1, 1))
+
+    def test_filter_factory(self):
+        middleware = filter_factory(
+            {}, sct_host=self.sct_host, sct_api_key=self.sct_api_key,
+            queue_size='5', overflow_policy=DROP_OLDEST)(_app('201 Created'))
+
+        try:
+            self.assertEqual(middleware.queue.max_size, 5)
+            self.assertEqual(middleware.queue.policy, DROP_OLDEST)
+            self.assertEqual(middleware.queue.client.sct_url, '{}/v1'.format(self.sct_host))
+        finally:
+            middleware.queue.close(timeout=5)
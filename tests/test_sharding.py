@@ -0,0 +1,176 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import multiprocessing
+import tempfile
+import shutil
+import json
+import os
+
+from unittest import TestCase, skipUnless
+from unittest.mock import Mock, patch
+
+from swift_cloud_tools.sharding import (
+    Counters, Shard, ShardedExpirer, _init_worker, _worker, process_shard, shard_for
+)
+
+
+class TestShardedExpirer(TestCase):
+
+    def setUp(self):
+        self.sct_host = 'http://swift-cloud-tools-dev.gcloud.dev.globoi.com'
+        self.sct_api_key = 'd003d7dc6e2a48e99aed5082160de1fa'
+        self.work_dir = tempfile.mkdtemp()
+        self.date = '2021-10-06 12:15:00'
+
+        self.items = [
+            {
+                'account': 'auth_{}'.format(account),
+                'container': 'container',
+                'object': 'object-{}.jpeg'.format(index),
+                'date': self.date
+            }
+            for account in range(4)
+            for index in range(5)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def _expirer(self, **kwargs):
+        return ShardedExpirer(self.sct_host, self.sct_api_key, self.work_dir, **kwargs)
+
+    def _client(self, status=201):
+        mock = Mock()
+        mock.status_code = status
+
+        client = Mock()
+        client.expirer_create.return_value = mock
+        client.expirer_delete.return_value = mock
+        return client
+
+    def test_shard_for_is_stable(self):
+        self.assertEqual(shard_for('auth_1', 'container', 8), shard_for('auth_1', 'container', 8))
+        self.assertTrue(0 <= shard_for('auth_1', 'container', 8) < 8)
+
+    def test_split_groups_containers(self):
+        expirer = self._expirer(processes=1, shards=3)
+        info = expirer.split(iter(self.items))
+
+        self.assertEqual(info, {'shards': 3, 'total': 20})
+
+        for index in range(3):
+            with open(Shard(self.work_dir, index).path) as shard_file:
+                for line in shard_file:
+                    account, container, obj, date = json.loads(line)
+                    self.assertEqual(shard_for(account, container, 3), index)
+                    self.assertEqual(date, self.date)
+
+    def test_split_from_file_is_idempotent(self):
+        manifest = os.path.join(self.work_dir, 'input.jsonl')
+        with open(manifest, 'w') as manifest_file:
+            for item in self.items:
+                manifest_file.write('{}\n'.format(json.dumps(item)))
+
+        expirer = self._expirer(processes=1, shards=2)
+        self.assertEqual(expirer.split(manifest)['total'], 20)
+        self.assertEqual(expirer.split(iter([]))['total'], 20)
+
+    def test_process_shard(self):
+        self._expirer(processes=1, shards=1).split(iter(self.items))
+        shard = Shard(self.work_dir, 0)
+        client = self._client()
+        counters = Counters()
+
+        state = process_shard(client, shard, checkpoint_every=7, counters=counters)
+
+        self.assertEqual(state['offset'], 20)
+        self.assertEqual(state['succeeded'], 20)
+        self.assertEqual(client.expirer_create.call_count, 20)
+        self.assertEqual(counters.snapshot(), {'processed': 20, 'succeeded': 20, 'failed': 0})
+        self.assertEqual(shard.load_checkpoint(), state)
+
+    def test_process_shard_concurrent(self):
+        self._expirer(processes=1, shards=1).split(iter(self.items))
+        shard = Shard(self.work_dir, 0)
+        client = self._client()
+
+        state = process_shard(client, shard, checkpoint_every=3, concurrency=4)
+
+        self.assertEqual(state['offset'], 20)
+        self.assertEqual(client.expirer_create.call_count, 20)
+
+    def test_process_shard_records_failures(self):
+        self._expirer(processes=1, shards=1).split(iter(self.items[:3]))
+        shard = Shard(self.work_dir, 0)
+
+        state = process_shard(self._client(status=404), shard, operation='delete')
+
+        self.assertEqual(state['failed'], 3)
+        with open(shard.failed_path) as failed:
+            self.assertEqual(len(failed.readlines()), 3)
+
+    def test_process_shard_resumes_from_checkpoint(self):
+        self._expirer(processes=1, shards=1).split(iter(self.items))
+        shard = Shard(self.work_dir, 0)
+
+        logged = '{}\n'.format(json.dumps({'object': 'object-0.jpeg', 'status': 500}))
+        with open(shard.failed_path, 'w') as failed:
+            failed.write(logged)
+            failed.write('{}\n'.format(json.dumps({'object': 'replayed.jpeg', 'status': 500})))
+        shard.save_checkpoint({'shard': 0, 'offset': 15, 'succeeded': 14, 'failed': 1,
+                               'failed_offset': len(logged)})
+        client = self._client(status=500)
+
+        state = process_shard(client, shard)
+
+        self.assertEqual(client.expirer_create.call_count, 5)
+        self.assertEqual(state['succeeded'], 14)
+        self.assertEqual(state['failed'], 6)
+
+        with open(shard.failed_path) as failed:
+            lines = failed.readlines()
+        self.assertEqual(len(lines), state['failed'])
+        self.assertEqual(lines[0], logged)
+        self.assertEqual(state['failed_offset'], os.path.getsize(shard.failed_path))
+
+    def test_worker_session_fits_concurrency(self):
+        self.addCleanup(_worker.clear)
+        _init_worker(self.sct_host, self.sct_api_key, Counters(),
+                     {'operation': 'create', 'checkpoint_every': 100, 'concurrency': 32})
+
+        session = _worker['client'].session
+        self.assertEqual(session.get_adapter(self.sct_host)._pool_maxsize, 32)
+        self.assertEqual(_worker['client'].limiter.max_limit, 32)
+
+    def test_invalid_operation(self):
+        with self.assertRaises(ValueError):
+            self._expirer(operation='update')
+
+    @skipUnless(multiprocessing.get_start_method() == 'fork', 'requires fork start method')
+    @patch('swift_cloud_tools.sharding.requests.Session')
+    def test_run(self, mock_session):
+        response = Mock()
+        response.status_code = 201
+        mock_session.return_value.post.return_value = response
+        progress = Mock()
+
+        summary = self._expirer(
+            processes=2, shards=4, progress_interval=0.01, concurrency=2).run(
+            iter(self.items), progress=progress)
+
+        self.assertEqual(summary['total'], 20)
+        self.assertEqual(summary['succeeded'], 20)
+        self.assertEqual(len(summary['shards']), 4)
+        self.assertEqual(sum(state['offset'] for state in summary['shards']), 20)
@@ -17,7 +17,7 @@ import json
 from unittest import TestCase
 from unittest.mock import Mock, MagicMock, patch
 
-from swift_cloud_tools.client import SCTClient
+from swift_cloud_tools.client import DEFAULT_TIMEOUT, SCTClient
 
 
 class TestTransfer(TestCase):
@@ -60,7 +60,8 @@ class TestTransfer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/transfer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -99,7 +100,8 @@ class TestTransfer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/transfer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -133,7 +135,8 @@ class TestTransfer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/transfer/'.format(self.sct_host),
             data=json.dumps(data),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -175,7 +178,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_get(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
@@ -200,7 +204,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_get(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -225,7 +230,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_get(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.content, content)
@@ -250,7 +256,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_status(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/status/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
@@ -275,7 +282,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_status(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/status/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
@@ -300,7 +308,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_status(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/status/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
@@ -325,7 +334,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_status(project_id)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/status/{}'.format(self.sct_host, project_id),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
@@ -377,7 +387,8 @@ class TestTransfer(TestCase):
         response = self.client.transfer_status_all(page, per_page)
         mock_request.assert_called_once_with(
             '{}/v1/transfer/status?page={}&per_page={}'.format(self.sct_host, page, per_page),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
@@ -423,7 +434,8 @@ class TestTransfer(TestCase):
         mock_request.assert_called_once_with(
             '{}/v1/transfer/status'.format(self.sct_host),
             data=json.dumps(project_ids),
-            headers=headers
+            headers=headers,
+            timeout=DEFAULT_TIMEOUT
         )
         self.assertEqual(response.status_code, status)
         self.assertEqual(response.json, content)
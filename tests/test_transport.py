@@ -0,0 +1,218 @@
+# Copyright 2021 Grupo Globo
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import threading
+import socket
+import json
+
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+import dns.resolver
+import requests
+
+from swift_cloud_tools.transport import DNSCache, WarmTransport
+from swift_cloud_tools.balancer import HostPool
+from swift_cloud_tools.client import SCTClient
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    paths = []
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        body = json.dumps({'status': 'Migrando', 'progress': 93}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestTransport(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.daemon = True
+        cls.thread.start()
+        cls.sct_host = 'http://localhost:{}'.format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.paths = []
+        self.dns_cache = DNSCache(use_record_ttl=False)
+
+    def _transport(self, **kwargs):
+        transport = WarmTransport(dns_cache=self.dns_cache, **kwargs)
+        self.addCleanup(transport.close)
+        return transport
+
+    def test_dns_cache(self):
+        first = self.dns_cache.resolve('localhost', 80)
+        second = self.dns_cache.resolve('localhost', 80)
+
+        self.assertEqual(first, second)
+        self.assertIn(('127.0.0.1', 80), first)
+        self.assertEqual(self.dns_cache.stats(), {'entries': 1, 'hits': 1, 'misses': 1, 'stale': 0})
+
+    def test_dns_cache_skips_ip_addresses(self):
+        self.assertEqual(self.dns_cache.resolve('10.0.0.1', 80), [('10.0.0.1', 80)])
+        self.assertEqual(self.dns_cache.stats()['misses'], 0)
+
+    def test_dns_cache_expires(self):
+        dns_cache = DNSCache(ttl=0, min_ttl=0, use_record_ttl=False)
+        dns_cache.resolve('localhost', 80)
+        dns_cache.resolve('localhost', 80)
+
+        self.assertEqual(dns_cache.stats()['misses'], 2)
+
+    def test_dns_cache_serves_stale_on_failure(self):
+        dns_cache = DNSCache(ttl=0, min_ttl=0, use_record_ttl=False)
+        addresses = dns_cache.resolve('localhost', 80)
+
+        with patch('swift_cloud_tools.transport.socket.getaddrinfo',
+                   side_effect=socket.gaierror()):
+            self.assertEqual(dns_cache.resolve('localhost', 80), addresses)
+            with self.assertRaises(socket.gaierror):
+                dns_cache.resolve('unknown.invalid', 80)
+
+        self.assertEqual(dns_cache.stats()['stale'], 1)
+
+    def _answer(self, ttl, *addresses):
+        answer = Mock()
+        answer.__iter__ = Mock(return_value=iter([Mock(address=address) for address in addresses]))
+        answer.rrset.ttl = ttl
+        return answer
+
+    @patch('swift_cloud_tools.transport.socket.getaddrinfo')
+    def test_dns_cache_uses_record_ttl(self, mock_getaddrinfo):
+        dns_cache = DNSCache(min_ttl=0)
+
+        with patch('dns.resolver.resolve', return_value=self._answer(5, '10.0.0.1', '10.0.0.2')) as mock_resolve:
+            with patch('swift_cloud_tools.transport.time.monotonic', return_value=100.0):
+                self.assertEqual(dns_cache.resolve('sct.example', 80),
+                                 [('10.0.0.1', 80), ('10.0.0.2', 80)])
+
+        mock_resolve.assert_called_once_with('sct.example', 'A', lifetime=1.0)
+        mock_getaddrinfo.assert_not_called()
+        self.assertEqual(dns_cache._entries[('sct.example', 80)][0], 105.0)
+
+    def test_dns_cache_falls_back_to_aaaa_and_getaddrinfo(self):
+        dns_cache = DNSCache()
+        side_effect = [dns.resolver.NoAnswer(), self._answer(30, '::1')]
+
+        with patch('dns.resolver.resolve', side_effect=side_effect) as mock_resolve:
+            self.assertEqual(dns_cache.resolve('sct.example', 80), [('::1', 80)])
+        self.assertEqual(mock_resolve.call_args[0][1], 'AAAA')
+
+        with patch('dns.resolver.resolve', side_effect=dns.resolver.NXDOMAIN()):
+            self.assertIn(('127.0.0.1', 80), dns_cache.resolve('localhost', 80))
+
+    def test_transport_record_ttl_option(self):
+        self.assertTrue(WarmTransport().dns_cache.use_record_ttl)
+        self.assertFalse(WarmTransport(dns_record_ttl=False).dns_cache.use_record_ttl)
+
+    def test_cold_call(self):
+        transport = self._transport(connections=0)
+        client = SCTClient(self.sct_host, 'key', transport=transport)
+
+        self.assertEqual(client.transfer_status('project').status_code, 200)
+
+        stats = transport.stats()
+        self.assertEqual(stats['cold_calls'], 1)
+        self.assertEqual(stats['warm_calls'], 0)
+        self.assertEqual(stats['dns']['misses'], 1)
+
+    def test_prewarmed_calls_are_warm(self):
+        transport = self._transport(connections=2)
+        client = SCTClient(self.sct_host, 'key', transport=transport)
+
+        self.assertEqual(transport.stats()['warmed_connections'], 2)
+        self.assertEqual(Handler.paths, [])
+
+        client.transfer_status('project')
+        client.transfer_status('project')
+
+        stats = transport.stats()
+        self.assertEqual(stats['cold_calls'], 0)
+        self.assertEqual(stats['warm_calls'], 2)
+        self.assertEqual(Handler.paths, ['/v1/transfer/status/project'] * 2)
+
+    def test_failed_cold_call_does_not_leak(self):
+        listener = socket.socket()
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        self.addCleanup(listener.close)
+
+        transport = self._transport(connections=1)
+        client = SCTClient(self.sct_host, 'key', transport=transport)
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            transport.session.get(
+                'http://127.0.0.1:{}/'.format(listener.getsockname()[1]), timeout=0.05)
+        client.transfer_status('project')
+
+        stats = transport.stats()
+        self.assertEqual(stats['cold_calls'], 0)
+        self.assertEqual(stats['warm_calls'], 1)
+
+    def test_host_pool_uses_transport(self):
+        transport = self._transport(connections=2)
+        pool = HostPool([self.sct_host])
+        client = SCTClient(pool, 'key', transport=transport)
+
+        self.assertIs(pool.hosts[0].session, transport.session)
+        self.assertEqual(transport.stats()['warmed_connections'], 2)
+
+        client.transfer_status('project')
+        client.transfer_status('project')
+
+        stats = transport.stats()
+        self.assertEqual(stats['cold_calls'], 0)
+        self.assertEqual(stats['warm_calls'], 2)
+
+    def test_ping(self):
+        transport = self._transport(connections=1, ping_path='/healthcheck')
+        transport.warm(self.sct_host)
+
+        transport.ping()
+
+        self.assertEqual(Handler.paths, ['/healthcheck'])
+        self.assertEqual(transport.stats()['warmed_connections'], 1)
+
+    def test_keepalive_worker(self):
+        transport = self._transport(connections=1, ping_path='/healthcheck',
+                                    keepalive_interval=0.01)
+        transport.warm(self.sct_host)
+
+        for _ in range(200):
+            if Handler.paths:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertIn('/healthcheck', Handler.paths)